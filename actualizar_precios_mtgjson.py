@@ -5,6 +5,7 @@ import os
 import sys
 import unicodedata
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Any, Tuple
 
 import requests
@@ -12,6 +13,16 @@ from dotenv import load_dotenv
 
 from config_tienda import PROJECT_ROOT, INVENTORY_CSV
 
+# orjson es opcional: si está instalado, decodifica los JSON de MTGJSON
+# (AllIdentifiers pesa cientos de MB) y de Scryfall bastante más rápido
+# que el módulo json estándar. Ambos aceptan bytes UTF-8.
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # ============================================================
 # CONFIGURACIÓN DESDE .env
 # ============================================================
@@ -41,13 +52,13 @@ PRICE_MIN_CLP = _get_float_env("PRICE_MIN_CLP", 500.0)
 # Orden de preferencia de proveedores de MTGJSON
 PREFERRED_PROVIDERS = ["cardkingdom", "tcgplayer", "cardmarket", "cardsphere"]
 
-# Multiplicadores por condición
-CONDITION_MULTIPLIERS = {
+# Multiplicadores por condición (solo lectura)
+CONDITION_MULTIPLIERS = MappingProxyType({
     "NM": 1.00, "M": 1.00,
     "EX": 0.90, "SP": 0.90,
     "VG": 0.80, "MP": 0.80,
     "HP": 0.60, "POOR": 0.40
-}
+})
 
 MTGJSON_DIR = PROJECT_ROOT / "mtgjson"
 ALL_IDENTIFIERS_GZ = MTGJSON_DIR / "AllIdentifiers.json.gz"
@@ -104,8 +115,8 @@ def ensure_mtgjson_files(force: bool = False):
 
 
 def load_json_gz(path: Path) -> Dict[str, Any]:
-    with gzip.open(path, "rt", encoding="utf-8") as f:
-        return json.load(f)
+    with gzip.open(path, "rb") as f:
+        return _json_loads(f.read())
 
 
 # ============================================================
@@ -198,7 +209,7 @@ def resolve_name_to_english(name: str, es_to_en: dict) -> str:
 # PRECIOS DESDE MTGJSON (POR uuid)
 # ============================================================
 
-def get_price_from_mtgjson(price_entry: Dict[str, Any], is_foil: bool, condition: str):
+def get_price_from_mtgjson(price_entry: Dict[str, Any], is_foil: bool, cond_mult: float):
     paper = price_entry.get("paper", {})
     provider_name = None
     provider_data = None
@@ -224,7 +235,6 @@ def get_price_from_mtgjson(price_entry: Dict[str, Any], is_foil: bool, condition
     except Exception:
         return None
 
-    cond_mult = CONDITION_MULTIPLIERS.get(condition.upper(), 1.0)
     adj_usd = base_usd * cond_mult
     adj_clp = adj_usd * USD_TO_CLP
 
@@ -242,7 +252,7 @@ def get_price_from_mtgjson(price_entry: Dict[str, Any], is_foil: bool, condition
 # PRECIOS DESDE SCRYFALL (FALLBACK EXCLUSIVO POR set+name)
 # ============================================================
 
-def get_price_from_scryfall(name_en: str, set_code: str, is_foil: bool, condition: str):
+def get_price_from_scryfall(name_en: str, set_code: str, is_foil: bool, cond_mult: float):
     """
     Obtiene precio EXCLUSIVAMENTE de la impresión REAL (set_code) en Scryfall.
 
@@ -262,7 +272,7 @@ def get_price_from_scryfall(name_en: str, set_code: str, is_foil: bool, conditio
         )
         if resp.status_code != 200:
             return None
-        data = resp.json()
+        data = _json_loads(resp.content)
     except Exception:
         return None
 
@@ -280,7 +290,6 @@ def get_price_from_scryfall(name_en: str, set_code: str, is_foil: bool, conditio
     except (TypeError, ValueError):
         return None
 
-    cond_mult = CONDITION_MULTIPLIERS.get(condition.upper(), 1.0)
     adj_usd = base_usd * cond_mult
     adj_clp = adj_usd * SCRYFALL_USD_TO_CLP
 
@@ -331,6 +340,8 @@ def actualizar_inventario(force_download: bool = False):
         set_code = (row.get("set", "") or "").strip().upper()
         lang = (row.get("lang", "") or "").lower()
         condition = row.get("condition", "NM")
+        # Multiplicador de condición resuelto una vez por fila
+        cond_mult = CONDITION_MULTIPLIERS.get(condition.upper(), 1.0)
         is_foil_str = str(row.get("is_foil", "")).lower()
         is_foil = is_foil_str in ("1", "true", "yes", "y", "foil")
 
@@ -378,13 +389,13 @@ def actualizar_inventario(force_download: bool = False):
         if uuid:
             price_entry = prices_data.get(uuid)
             if price_entry:
-                mtg_result = get_price_from_mtgjson(price_entry, is_foil, condition)
+                mtg_result = get_price_from_mtgjson(price_entry, is_foil, cond_mult)
                 if mtg_result:
                     price_usd, price_clp, source = mtg_result
 
         # 3) Fallback: Scryfall SOLO para ese set+nombre
         if price_usd is None:
-            scry_result = get_price_from_scryfall(name_en_raw, set_code, is_foil, condition)
+            scry_result = get_price_from_scryfall(name_en_raw, set_code, is_foil, cond_mult)
             if scry_result:
                 price_usd, price_clp, source = scry_result
 
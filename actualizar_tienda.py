@@ -1,13 +1,17 @@
 import argparse
 import csv
+import gzip
+import hashlib
 import json
 import os
 import shutil
 import subprocess
 import sys
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 
 from config_tienda import (
@@ -16,7 +20,9 @@ from config_tienda import (
     DEPLOY_DIR,
     INVENTORY_CSV,
     OUTPUT_HTML,
+    OUTPUT_HTML_STAMP,
     DEPLOY_IMAGES_DIR,
+    DEPLOY_THUMBS_DIR,
     GIT_REPO_DIR,
 )
 import os  # ya lo tienes
@@ -24,11 +30,62 @@ from dotenv import load_dotenv
 
 load_dotenv(PROJECT_ROOT / ".env")
 
+# brotli es opcional: si no está instalado solo se genera el .html.gz
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# rcssmin/rjsmin son opcionales: si están instalados, el CSS y el JS de la
+# página se minifican al generar el HTML (TIENDA_MINIFY=0 en .env lo apaga,
+# para revisar la página con el código legible).
+try:
+    import rcssmin  # type: ignore
+    import rjsmin  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    rcssmin = rjsmin = None
+
+MINIFY_HTML = rcssmin is not None and os.getenv("TIENDA_MINIFY", "1") != "0"
+
+# Pillow es opcional: si está instalado, copy_images deja además una
+# miniatura de cada foto en DEPLOY_THUMBS_DIR y la grilla la usa en vez de
+# bajar la foto completa para una tarjeta de ~200 px.
+try:
+    from PIL import Image, ImageOps  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    Image = ImageOps = None
+
+THUMBNAILS_ENABLED = Image is not None
+
+# Ancho de las miniaturas. La foto de una tarjeta ocupa ~160-240 px CSS
+# (grilla de minmax(176px, 1fr), 2 columnas en celular), así que 540 px
+# alcanza para pantallas de densidad 2x y para celulares de 3x.
+THUMB_WIDTH = 540
+
+# orjson es opcional: si está instalado, serializa cada carta bastante más
+# rápido que json (recibe cualquier valor JSON, aquí la fila de una carta).
+# Ambos dejan el JSON compacto y en UTF-8 (sin \uXXXX para acentos), así
+# que la página sale igual con o sin orjson.
+try:
+    import orjson
+
+    def _encode_card(card: Any) -> str:
+        return orjson.dumps(card).decode("utf-8")
+except ImportError:
+    _encode_card = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
 # ========== CONFIGURACIÓN DE RUTAS ==========
 
 # Carpeta donde están este script y el inventario
 PROJECT_DIR = PROJECT_ROOT  # normalmente .../inventario_magic
 
+# Buffer de escritura del HTML (1 MiB): el JSON de cartas se escribe en
+# muchos trozos pequeños y así se juntan en pocas llamadas al sistema.
+HTML_WRITE_BUFFER = 1 << 20
+
+# Valores de status que cuentan como carta disponible (ya en minúsculas)
+_AVAILABLE_STATUSES = frozenset({"available", "avail", ""})
+
 # =========================
 # Funciones auxiliares
 # =========================
@@ -73,10 +130,18 @@ def run_script(script_name: str):
     print(f"[OK] {script_name} ejecutado correctamente.")
 
 
+# Separador de miles chileno: "1,234,567" -> "1.234.567" en una sola pasada
+_CLP_THOUSANDS = str.maketrans(",", ".")
+
+
+@lru_cache(maxsize=4096)
 def format_clp(value):
     """
     Formatea precios CLP. Acepta tanto int como string.
     Si viene vacío o None → devuelve 'Consultar'.
+
+    Se memoiza: los precios se repiten mucho (piso de 500, valores redondos),
+    así que cada valor distinto se formatea una sola vez.
     """
     if value is None:
         return "Consultar"
@@ -93,57 +158,79 @@ def format_clp(value):
 
     # Si llega aquí, value es int
     try:
-        return f"${value:,.0f}".replace(",", ".")
+        return "$" + format(value, ",.0f").translate(_CLP_THOUSANDS)
     except:
         return "Consultar"
 
 
 # ========== LECTURA DEL INVENTARIO ==========
 
-def load_inventory(csv_path: Path) -> List[Dict]:
+def load_inventory(csv_path: Path) -> Iterator[Dict]:
     """
-    Carga inventario_cartas.csv y devuelve una lista de filas filtradas:
+    Lee inventario_cartas.csv y va entregando (generador) las filas filtradas:
     - Solo status = 'available'
     - Solo quantity > 0
-    Además calcula price_display (CLP formateado) y normaliza is_foil.
+    Además normaliza is_foil, image_url y los datos del vendedor.
+
+    No arma una lista intermedia: prepare_cards_for_frontend consume cada
+    fila apenas se lee, en una sola pasada sobre el CSV.
     """
     if not csv_path.exists():
         raise SystemExit(f"[ERROR] No se encontró el CSV de inventario: {csv_path}")
 
-    rows: List[Dict] = []
+    count = 0
     with csv_path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            status = (row.get("status") or "").strip().lower()
-            if status not in {"available", "avail", ""}:
+        # csv.reader + índices de columna: status y quantity se revisan sobre
+        # la lista cruda y el dict por fila solo se arma para las que quedan.
+        reader = csv.reader(f)
+        header = next(reader, [])
+        n_cols = len(header)
+        cols = {name: i for i, name in enumerate(header)}
+        status_i = cols.get("status")
+        quantity_i = cols.get("quantity")
+        for values in reader:
+            if not values:
                 continue
+            if len(values) < n_cols:
+                values += [""] * (n_cols - len(values))
 
-            try:
-                quantity = int(row.get("quantity", 0))
-            except ValueError:
-                quantity = 0
+            # Caso común primero: "available" tal cual, sin strip()/lower()
+            status = values[status_i] if status_i is not None else ""
+            if status != "available" and status.strip().lower() not in _AVAILABLE_STATUSES:
+                continue
+
+            # Caso común: solo dígitos, sin pasar por el try/except
+            quantity_str = values[quantity_i] if quantity_i is not None else ""
+            if quantity_str.isdecimal():
+                quantity = int(quantity_str)
+            else:
+                try:
+                    quantity = int(quantity_str)
+                except ValueError:
+                    quantity = 0
 
             if quantity <= 0:
                 continue
 
+            row = dict(zip(header, values))
+            get = row.get
             row["quantity"] = quantity
-            row["price_display"] = format_clp((row.get("price_clp") or "").strip())
-            row["is_foil"] = (row.get("is_foil") or "").strip().lower()
-            row["image_url"] = (row.get("image_url") or "").strip()
+            row["is_foil"] = (get("is_foil") or "").strip().lower()
+            row["image_url"] = (get("image_url") or "").strip()
 
             # Aseguramos que los campos nuevos existan aunque vengan vacíos
-            row["seller_name"] = (row.get("seller_name") or "").strip()
-            row["seller_phone"] = (row.get("seller_phone") or "").strip()
+            row["seller_name"] = (get("seller_name") or "").strip()
+            row["seller_phone"] = (get("seller_phone") or "").strip()
 
-            rows.append(row)
+            count += 1
+            yield row
 
-    print(f"[INFO] Inventario cargado: {len(rows)} cartas disponibles.")
-    return rows
+    print(f"[INFO] Inventario cargado: {count} cartas disponibles.")
 
 
 # ========== PREPARACIÓN DE CARTAS PARA EL FRONT ==========
 
-def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+def prepare_cards_for_frontend(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Transforma las filas del CSV en una estructura optimizada para el frontend.
 
@@ -182,46 +269,52 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
     }
 
     def condition_rank(cond: str) -> int:
-        return condition_order.get(cond.upper(), 0)
+        # `cond` ya viene en mayúsculas desde el loop de filas
+        return condition_order.get(cond, 0)
 
     groups: Dict[str, Dict[str, Any]] = {}
 
     for row in rows:
-        name = (row.get("name") or "").strip()
+        get = row.get  # un solo lookup del método por fila
+        name = (get("name") or "").strip()
         if not name:
             continue
 
         # 👇 NUEVO: nombres alternativos para búsqueda
-        name_en = (row.get("name_en") or "").strip()
-        name_es = (row.get("name_es") or "").strip()
-        printed_name = (row.get("printed_name") or "").strip()
-
-        set_code = (row.get("set") or "").strip()
-        condition = (row.get("condition") or "").strip().upper()
-        fmt = (row.get("format") or "").strip()
-        lang = (row.get("lang") or "").strip().upper()
-        is_foil_flag = str(row.get("is_foil") or "").strip().lower() == "true"
-
-        quantity = safe_int(row.get("quantity"), 0)
+        name_en = (get("name_en") or "").strip()
+        name_es = (get("name_es") or "").strip()
+        printed_name = (get("printed_name") or "").strip()
+
+        set_code = (get("set") or "").strip()
+        condition = (get("condition") or "").strip().upper()
+        fmt = (get("format") or "").strip()
+        lang = (get("lang") or "").strip().upper()
+        # is_foil, image_url y los datos del vendedor ya vienen limpios
+        # (strip/lower) desde load_inventory
+        is_foil_flag = row["is_foil"] == "true"
+
+        quantity = safe_int(get("quantity"), 0)
         if quantity <= 0:
             continue
 
-        image_file = row.get("image_url") or ""
-        price_clp_str = (row.get("price_clp") or "").strip()
+        image_file = row["image_url"]
+        price_clp_str = (get("price_clp") or "").strip()
         price_clp_val = safe_int(price_clp_str, 0)
-        price_usd_ref = safe_float(row.get("price_usd_ref"))
+        price_usd_ref = safe_float(get("price_usd_ref"))
 
-        seller_name = (row.get("seller_name") or "").strip()
-        seller_phone = (row.get("seller_phone") or "").strip()
+        seller_name = row["seller_name"]
+        seller_phone = row["seller_phone"]
 
-        # Nuevo: la carta se agrupa por nombre + número del vendedor
-        seller_phone = (row.get("seller_phone") or "").strip()
-        key = f"{name.lower()}__{seller_phone}"
+        # Nuevo: la carta se agrupa por nombre + número del vendedor.
+        # name_lower se calcula una vez y se reutiliza para ordenar al final.
+        name_lower = name.lower()
+        key = f"{name_lower}__{seller_phone}"
 
 
         if key not in groups:
             groups[key] = {
                 "name": name,
+                "name_lower": name_lower,
                 "set_codes": set(),           # varios sets posibles
                 "condition": condition,
                 "format": fmt,
@@ -238,8 +331,8 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
                 # para elegir mejor precio:
                 "best_price_clp_nonfoil": None,
                 "best_price_usd_nonfoil": None,
-                "seller_name": row.get("seller_name", "").strip(),
-                "seller_phone": row.get("seller_phone", "").strip(),
+                "seller_name": seller_name,
+                "seller_phone": seller_phone,
                 # 👇 NUEVO: conjunto de alias para búsqueda
                 "search_aliases": set(),
 
@@ -310,9 +403,12 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
                 g["best_price_clp"] = price_clp_val
                 g["best_price_usd_ref"] = price_usd_ref
 
-    # Convertir grupos en lista para el frontend
+    # Convertir grupos en lista para el frontend, ya ordenados por nombre
+    # (orden estable: igual que ordenar después la lista de cartas; la clave
+    # sale con itemgetter, sin una llamada a lambda por grupo)
     cards: List[Dict[str, Any]] = []
-    for key, g in groups.items():
+    append_card = cards.append
+    for g in sorted(groups.values(), key=itemgetter("name_lower")):
         langs_sorted = sorted(list(g["langs"])) if g["langs"] else []
         lang_display = "/".join(langs_sorted) if langs_sorted else ""
 
@@ -361,7 +457,7 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
 
 
         search_aliases_str = " ".join(sorted(g.get("search_aliases", set())))
-        cards.append(
+        append_card(
             {
                 "name": g["name"],
                 "set": set_display,
@@ -370,7 +466,9 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
                 "isFoil": is_foil_card,
                 "hasFoil": g["hasFoil"],
                 "hasNonFoil": g["hasNonFoil"],
-                "format": g["format"],
+                # En mayúsculas desde aquí: la tarjeta lo muestra así y la
+                # búsqueda lo compara en minúsculas igual
+                "format": g["format"].upper(),
                 "quantity": g["quantity"],
                 "price": price_label,          # 👈 texto final (CLP o CK XXX)
                 "priceUsdRef": price_usd_ref_str,
@@ -383,32 +481,45 @@ def prepare_cards_for_frontend(rows: List[Dict[str, str]]) -> List[Dict[str, Any
             }
         )
 
-
-    # Ordenar por nombre
-    cards.sort(key=lambda c: c["name"].lower())
     return cards
 
 
 # ========== HTML CON PAGINACIÓN + MODAL GRANDE ==========
 
-def build_full_html(cards: List[Dict]) -> str:
-    """
-    Construye el HTML completo de la tienda, con:
-    - Paginación en el front.
-    - Modal grande para ver copias.
-    - Agrupación de cartas por nombre/set/condición/foil/formato ignorando idioma.
-    - Botón flotante de WhatsApp general.
-    - Botón de WhatsApp POR COPIA dentro del modal (usa sellerPhone).
-    """
-    cards_json = json.dumps(cards, ensure_ascii=False)
-    template = f"""<!DOCTYPE html>
+# Columnas del JSON embebido. Las cartas viajan como filas (listas) en este
+# orden y no como objetos, para no repetir los nombres de campo en cada
+# carta; el JS (unpackCards) vuelve a armar los objetos al cargar la página.
+# Deben coincidir con los dicts que arma prepare_cards_for_frontend.
+CARD_JSON_KEYS = (
+    "name", "set", "lang", "condition", "isFoil", "hasFoil", "hasNonFoil",
+    "format", "quantity", "price", "priceUsdRef", "imageFile", "copies",
+    "seller_name", "seller_phone", "searchAliases",
+)
+COPY_JSON_KEYS = (
+    "imageFile", "quantity", "lang", "condition", "format", "isFoil",
+    "priceClp", "set", "sellerName", "sellerPhone",
+)
+_COPIES_COLUMN = CARD_JSON_KEYS.index("copies")
+
+# Columnas con pocos valores distintos (sets, idiomas, condición, formato,
+# vendedor): en las filas van como índice a una tabla de strings única ("s")
+# que se escribe una sola vez al final del JSON.
+CARD_DICT_KEYS = ("set", "lang", "condition", "format", "seller_name", "seller_phone")
+COPY_DICT_KEYS = ("lang", "condition", "format", "set", "sellerName", "sellerPhone")
+_CARD_DICT_COLUMNS = tuple(CARD_JSON_KEYS.index(k) for k in CARD_DICT_KEYS)
+_COPY_DICT_COLUMNS = tuple(COPY_JSON_KEYS.index(k) for k in COPY_DICT_KEYS)
+
+# Plantilla de la página, partida donde va el JSON de cartas (cardsData).
+# Son strings normales (no f-string): las llaves de CSS/JS van sin duplicar
+# y la plantilla no se vuelve a procesar en cada corrida.
+HTML_HEAD = """<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8" />
     <title>Tienda de Cartas Magic</title>
     <meta name="viewport" content="width=device-width, initial-scale=1" />
     <style>
-        :root {{
+        :root {
             --bg-color: #050816;
             --bg-card: #0b1020;
             --bg-card-hover: #151b33;
@@ -428,14 +539,14 @@ def build_full_html(cards: List[Dict]) -> str:
             --pill-bg: rgba(15, 23, 42, 0.9);
             --pill-border: rgba(148, 163, 184, 0.5);
             --nav-bg: rgba(15, 23, 42, 0.95);
-        }}
+        }
 
-        * {{
+        * {
             box-sizing: border-box;
-        }}
+        }
 
         html,
-        body {{
+        body {
             margin: 0;
             padding: 0;
             min-height: 100%;
@@ -445,15 +556,15 @@ def build_full_html(cards: List[Dict]) -> str:
                 radial-gradient(circle at bottom right, rgba(8, 217, 214, 0.12), transparent 60%);
             color: var(--text-main);
             font-family: system-ui, -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-        }}
+        }
 
-        body {{
+        body {
             display: flex;
             justify-content: center;
             padding: 0;
-        }}
+        }
 
-        .page-shell {{
+        .page-shell {
             width: 100%;
             max-width: 1240px;
             min-height: 100vh;
@@ -461,9 +572,9 @@ def build_full_html(cards: List[Dict]) -> str:
             flex-direction: column;
             background: radial-gradient(circle at 0 0, rgba(15, 23, 42, 0.95), rgba(15, 23, 42, 0.97));
             box-shadow: var(--shadow-hard);
-        }}
+        }
 
-        header {{
+        header {
             position: sticky;
             top: 0;
             z-index: 40;
@@ -475,9 +586,9 @@ def build_full_html(cards: List[Dict]) -> str:
                 rgba(15, 23, 42, 0.9)
             );
             border-bottom: 1px solid rgba(15, 23, 42, 0.95);
-        }}
+        }
 
-        .header-inner {{
+        .header-inner {
             max-width: 1200px;
             margin: 0 auto;
             padding: 0.65rem 1.2rem;
@@ -485,15 +596,15 @@ def build_full_html(cards: List[Dict]) -> str:
             align-items: center;
             justify-content: space-between;
             gap: 1rem;
-        }}
+        }
 
-        .brand {{
+        .brand {
             display: flex;
             align-items: center;
             gap: 0.75rem;
-        }}
+        }
 
-        .brand-icon {{
+        .brand-icon {
             width: 32px;
             height: 32px;
             border-radius: 999px;
@@ -505,42 +616,42 @@ def build_full_html(cards: List[Dict]) -> str:
             font-weight: 800;
             font-size: 1.1rem;
             color: #fefce8;
-        }}
+        }
 
-        .brand-text-main {{
+        .brand-text-main {
             font-weight: 700;
             letter-spacing: 0.06em;
             text-transform: uppercase;
             font-size: 0.95rem;
-        }}
+        }
 
-        .brand-text-sub {{
+        .brand-text-sub {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .brand-text-wrapper {{
+        .brand-text-wrapper {
             display: flex;
             flex-direction: column;
             gap: 0.15rem;
-        }}
+        }
 
-        .toolbar-top {{
+        .toolbar-top {
             display: flex;
             flex-direction: column;
             gap: 0.45rem;
             flex: 1;
-        }}
+        }
 
-        .toolbar-top-row {{
+        .toolbar-top-row {
             display: flex;
             gap: 0.5rem;
             align-items: center;
             justify-content: flex-end;
             flex-wrap: wrap;
-        }}
+        }
 
-        .toolbar-pill {{
+        .toolbar-pill {
             background: rgba(15, 23, 42, 0.95);
             border-radius: 999px;
             padding: 0.25rem 0.6rem;
@@ -550,33 +661,33 @@ def build_full_html(cards: List[Dict]) -> str:
             gap: 0.35rem;
             font-size: 0.7rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .toolbar-pill strong {{
+        .toolbar-pill strong {
             color: var(--accent);
-        }}
+        }
 
-        .toolbar-stats {{
+        .toolbar-stats {
             display: flex;
             align-items: center;
             gap: 0.5rem;
             justify-content: flex-end;
             flex-wrap: wrap;
-        }}
+        }
 
-        .counter-strong {{
+        .counter-strong {
             font-weight: 600;
             color: var(--text-main);
-        }}
+        }
 
-        main {{
+        main {
             flex: 1;
             max-width: 1200px;
             margin: 0 auto;
             padding: 0.75rem 1.2rem 1.2rem;
-        }}
+        }
 
-        .search-card {{
+        .search-card {
             background: radial-gradient(circle at top left, rgba(8, 47, 73, 0.6), transparent 60%),
                         radial-gradient(circle at bottom right, rgba(15, 23, 42, 0.95), transparent 55%),
                         rgba(15, 23, 42, 0.98);
@@ -585,34 +696,34 @@ def build_full_html(cards: List[Dict]) -> str:
             border: 1px solid rgba(15, 23, 42, 0.95);
             box-shadow: var(--shadow-soft-sm);
             margin-bottom: 0.85rem;
-        }}
+        }
 
-        .search-header {{
+        .search-header {
             display: flex;
             justify-content: space-between;
             align-items: flex-start;
             gap: 0.75rem;
             margin-bottom: 0.65rem;
-        }}
+        }
 
-        .search-title {{
+        .search-title {
             font-size: 0.95rem;
             font-weight: 600;
-        }}
+        }
 
-        .search-sub {{
+        .search-sub {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .search-input-wrapper {{
+        .search-input-wrapper {
             position: relative;
             display: flex;
             align-items: center;
             margin-top: 0.35rem;
-        }}
+        }
 
-        .search-input {{
+        .search-input {
             width: 100%;
             padding: 0.5rem 0.65rem 0.5rem 2.0rem;
             border-radius: 999px;
@@ -622,64 +733,64 @@ def build_full_html(cards: List[Dict]) -> str:
             font-size: 0.85rem;
             outline: none;
             box-shadow: 0 0 0 1px rgba(15, 23, 42, 0.9);
-        }}
+        }
 
-        .search-input::placeholder {{
+        .search-input::placeholder {
             color: rgba(148, 163, 184, 0.7);
-        }}
+        }
 
-        .search-icon {{
+        .search-icon {
             position: absolute;
             left: 0.7rem;
             width: 1rem;
             height: 1rem;
             opacity: 0.85;
             pointer-events: none;
-        }}
+        }
 
-        .search-hint {{
+        .search-hint {
             margin-top: 0.3rem;
             font-size: 0.7rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .search-hint strong {{
+        .search-hint strong {
             color: var(--accent);
-        }}
+        }
 
-        .cards-section-header {{
+        .cards-section-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 0.6rem;
             gap: 0.75rem;
-        }}
+        }
 
-        .cards-section-title {{
+        .cards-section-title {
             font-size: 0.85rem;
             font-weight: 600;
             color: var(--text-muted);
             text-transform: uppercase;
             letter-spacing: 0.08em;
-        }}
+        }
 
-        .cards-section-sub {{
+        .cards-section-sub {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .pagination-info {{
+        .pagination-info {
             font-size: 0.75rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .cards-grid {{
+        .cards-grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(176px, 1fr));
             gap: 0.8rem;
-        }}
+        }
 
-        .card {{
+        .card {
             background: radial-gradient(circle at top left, rgba(8, 217, 214, 0.08), transparent 55%),
                         radial-gradient(circle at bottom right, rgba(59, 130, 246, 0.1), transparent 55%),
                         var(--bg-card);
@@ -691,9 +802,9 @@ def build_full_html(cards: List[Dict]) -> str:
             border: 1px solid rgba(15, 23, 42, 0.8);
             position: relative;
             overflow: hidden;
-        }}
+        }
 
-        .card::before {{
+        .card::before {
             content: "";
             position: absolute;
             inset: 0;
@@ -702,19 +813,19 @@ def build_full_html(cards: List[Dict]) -> str:
             opacity: 0;
             pointer-events: none;
             transition: opacity 0.2s ease-out;
-        }}
+        }
 
-        .card:hover::before {{
+        .card:hover::before {
             opacity: 1;
-        }}
+        }
 
-        .card:hover {{
+        .card:hover {
             background: var(--bg-card-hover);
             transform: translateY(-1px);
             transition: transform 0.12s ease-out, background 0.15s ease-out;
-        }}
+        }
 
-        .card-image-wrapper {{
+        .card-image-wrapper {
             border-radius: 14px;
             overflow: hidden;
             aspect-ratio: 3 / 4;
@@ -723,68 +834,68 @@ def build_full_html(cards: List[Dict]) -> str:
             background-color: #020617;
             background-image: radial-gradient(circle at top, #020617 0, #020617 30%, #020617 100%);
             position: relative;
-        }}
+        }
 
-        .card-image-wrapper img {{
+        .card-image-wrapper img {
             width: 100%;
             height: 100%;
             object-fit: cover;
             display: block;
-        }}
+        }
 
-        .card-body {{
+        .card-body {
             display: flex;
             flex-direction: column;
             gap: 0.45rem;
             margin-top: 0.25rem;
-        }}
+        }
 
-        .card-name {{
+        .card-name {
             font-size: 0.95rem;
             font-weight: 600;
             line-height: 1.2;
-        }}
+        }
 
-        .card-tags {{
+        .card-tags {
             display: flex;
             flex-wrap: wrap;
             gap: 0.35rem;
             color: var(--text-muted);
-        }}
+        }
 
         .card-tag,
-        .tag {{
+        .tag {
             padding: 0.12rem 0.45rem;
             border-radius: 999px;
             border: 1px solid rgba(148, 163, 184, 0.5);
             background: rgba(15, 23, 42, 0.9);
             font-size: 0.7rem;
-        }}
+        }
 
-        .card-footer {{
+        .card-footer {
             display: flex;
             flex-direction: column;   /* 👈 ahora los hijos van uno bajo otro */
             align-items: flex-start;
             margin-top: 0.35rem;
             gap: 0.25rem;   
-        }}
-        .card-footer-actions {{
+        }
+        .card-footer-actions {
             display: flex;
             align-items: center;
             gap: 0.4rem; /* separación entre WhatsApp y Ver stock */
-        }}
+        }
 
-        .price-main {{
+        .price-main {
             font-size: 0.95rem;
             font-weight: 600;
-        }}
+        }
 
-        .price-ref {{
+        .price-ref {
             font-size: 0.7rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .qty-pill {{
+        .qty-pill {
             padding: 0.18rem 0.7rem;
             border-radius: 999px;
             background: var(--pill-bg);
@@ -796,15 +907,15 @@ def build_full_html(cards: List[Dict]) -> str:
                 background 0.15s ease,
                 color 0.15s ease,
                 border-color 0.15s ease;
-        }}
+        }
 
-        .qty-pill:hover {{
+        .qty-pill:hover {
             background: rgba(8, 217, 214, 0.08);
             color: #e5e7eb;
             border-color: var(--accent-soft);
-        }}
+        }
 
-        .empty-state {{
+        .empty-state {
             margin-top: 1.5rem;
             padding: 1.2rem;
             border-radius: var(--border-radius-lg);
@@ -813,16 +924,16 @@ def build_full_html(cards: List[Dict]) -> str:
             text-align: center;
             font-size: 0.85rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .pagination-container {{
+        .pagination-container {
             display: flex;
             justify-content: center;
             margin-top: 0.75rem;
             gap: 0.4rem;
-        }}
+        }
 
-        .page-btn {{
+        .page-btn {
             border-radius: 999px;
             border: 1px solid rgba(148, 163, 184, 0.6);
             background: rgba(15, 23, 42, 0.95);
@@ -830,27 +941,27 @@ def build_full_html(cards: List[Dict]) -> str:
             padding: 0.15rem 0.55rem;
             font-size: 0.75rem;
             cursor: pointer;
-        }}
+        }
 
-        .page-btn.active {{
+        .page-btn.active {
             background: var(--accent);
             border-color: var(--accent);
             color: #020617;
             font-weight: 600;
-        }}
+        }
 
-        .page-btn:disabled {{
+        .page-btn:disabled {
             opacity: 0.3;
             cursor: default;
-        }}
+        }
 
-        footer {{
+        footer {
             margin-top: auto;
             border-top: 1px solid rgba(15, 23, 42, 0.9);
             background: rgba(15, 23, 42, 0.97);
-        }}
+        }
 
-        .footer-inner {{
+        .footer-inner {
             max-width: 1200px;
             margin: 0 auto;
             padding: 0.55rem 1.2rem;
@@ -859,18 +970,18 @@ def build_full_html(cards: List[Dict]) -> str:
             align-items: center;
             font-size: 0.7rem;
             color: var(--text-muted);
-        }}
+        }
 
         /* ===== MODAL GRANDE DE COPIAS ===== */
 
-        .copies-modal {{
+        .copies-modal {
             position: fixed;
             inset: 0;
             z-index: 999;
             display: none;
-        }}
+        }
 
-        .copies-modal-backdrop {{
+        .copies-modal-backdrop {
             position: absolute;
             inset: 0;
             background: rgba(15, 23, 42, 0.88);
@@ -878,9 +989,9 @@ def build_full_html(cards: List[Dict]) -> str:
             align-items: center;
             justify-content: center;
             padding: 1.2rem;
-        }}
+        }
 
-        .copies-modal-dialog {{
+        .copies-modal-dialog {
             max-width: 960px;
             width: 100%;
             max-height: 90vh;
@@ -892,27 +1003,27 @@ def build_full_html(cards: List[Dict]) -> str:
             flex-direction: column;
             padding: 0.9rem;
             gap: 0.6rem;
-        }}
+        }
 
-        .copies-modal-header {{
+        .copies-modal-header {
             display: flex;
             justify-content: space-between;
             align-items: flex-start;
             gap: 0.75rem;
-        }}
+        }
 
-        .copies-modal-title {{
+        .copies-modal-title {
             font-size: 1.05rem;
             font-weight: 600;
-        }}
+        }
 
-        .copies-modal-meta {{
+        .copies-modal-meta {
             margin-top: 0.2rem;
             font-size: 0.8rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .copies-modal-close {{
+        .copies-modal-close {
             border: none;
             background: rgba(15, 23, 42, 0.95);
             border-radius: 999px;
@@ -921,26 +1032,26 @@ def build_full_html(cards: List[Dict]) -> str:
             color: var(--text-muted);
             cursor: pointer;
             border: 1px solid rgba(148, 163, 184, 0.5);
-        }}
+        }
 
-        .copies-modal-close:hover {{
+        .copies-modal-close:hover {
             background: rgba(30, 64, 175, 0.8);
             color: #e5e7eb;
-        }}
+        }
 
-        .copies-modal-body {{
+        .copies-modal-body {
             flex: 1;
             margin-top: 0.3rem;
             overflow-y: auto;
-        }}
+        }
 
-        .copies-modal-grid {{
+        .copies-modal-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
             gap: 0.6rem;
-        }}
+        }
 
-        .copies-modal-item {{
+        .copies-modal-item {
             background: rgba(15, 23, 42, 0.95);
             border-radius: 12px;
             border: 1px solid rgba(30, 64, 175, 0.7);
@@ -948,22 +1059,22 @@ def build_full_html(cards: List[Dict]) -> str:
             box-shadow: var(--shadow-soft-sm);
             display: flex;
             flex-direction: column;
-        }}
+        }
 
-        .copies-modal-imgwrap {{
+        .copies-modal-imgwrap {
             position: relative;
             aspect-ratio: 3 / 4;
             background: #020617;
-        }}
+        }
 
-        .copies-modal-imgwrap img {{
+        .copies-modal-imgwrap img {
             width: 100%;
             height: 100%;
             object-fit: cover;
             display: block;
-        }}
+        }
 
-        .copies-modal-qty {{
+        .copies-modal-qty {
             position: absolute;
             bottom: 0.2rem;
             right: 0.25rem;
@@ -971,9 +1082,9 @@ def build_full_html(cards: List[Dict]) -> str:
             border-radius: 999px;
             background: rgba(15, 23, 42, 0.95);
             font-size: 0.7rem;
-        }}
+        }
 
-        .copies-modal-lang {{
+        .copies-modal-lang {
             position: absolute;
             top: 0.2rem;
             left: 0.25rem;
@@ -981,46 +1092,46 @@ def build_full_html(cards: List[Dict]) -> str:
             border-radius: 999px;
             background: rgba(30, 64, 175, 0.95);
             font-size: 0.7rem;
-        }}
+        }
 
         /* Info + WhatsApp por copia */
 
-        .copies-modal-info {{
+        .copies-modal-info {
             padding: 0.45rem 0.55rem 0.5rem;
             display: flex;
             flex-direction: column;
             gap: 0.25rem;
             font-size: 0.8rem;
-        }}
+        }
 
-        .copies-modal-meta-row {{
+        .copies-modal-meta-row {
             display: flex;
             flex-wrap: wrap;
             gap: 0.35rem;
             color: var(--text-muted);
-        }}
+        }
 
-        .copy-pill {{
+        .copy-pill {
             padding: 0.1rem 0.45rem;
             border-radius: 999px;
             border: 1px solid rgba(148, 163, 184, 0.4);
             background: rgba(15, 23, 42, 0.95);
-        }}
+        }
 
-        .copy-price-row {{
+        .copy-price-row {
             display: flex;
             justify-content: space-between;
             align-items: center;
             gap: 0.35rem;
             margin-top: 0.2rem;
-        }}
+        }
 
-        .copy-price-main {{
+        .copy-price-main {
             font-weight: 600;
             font-size: 0.85rem;
-        }}
+        }
 
-        .copy-whatsapp-btn {{
+        .copy-whatsapp-btn {
             border-radius: 999px;
             border: none;
             background: #22c55e;
@@ -1033,15 +1144,15 @@ def build_full_html(cards: List[Dict]) -> str:
             cursor: pointer;
             text-decoration: none;
             white-space: nowrap;
-        }}
+        }
 
-        .copy-whatsapp-btn span {{
+        .copy-whatsapp-btn span {
             font-size: 0.8rem;
-        }}
+        }
 
         /* ===== BOTÓN FLOTANTE WHATSAPP GENERAL ===== */
 
-        .whatsapp-fab {{
+        .whatsapp-fab {
             position: fixed;
             bottom: 1.4rem;
             right: 1.4rem;
@@ -1056,9 +1167,9 @@ def build_full_html(cards: List[Dict]) -> str:
             font-size: 0.8rem;
             text-decoration: none;
             box-shadow: 0 18px 35px rgba(22, 163, 74, 0.7);
-        }}
+        }
 
-        .whatsapp-fab-icon {{
+        .whatsapp-fab-icon {
             width: 1.4rem;
             height: 1.4rem;
             border-radius: 999px;
@@ -1067,14 +1178,14 @@ def build_full_html(cards: List[Dict]) -> str:
             align-items: center;
             justify-content: center;
             font-size: 1rem;
-        }}
+        }
 
-        .whatsapp-fab-text {{
+        .whatsapp-fab-text {
             white-space: nowrap;
-        }}
+        }
 
         /* Botón flotante para publicar cartas (lado izquierdo) */
-        .whatsapp-publish-fab {{
+        .whatsapp-publish-fab {
             position: fixed;
             bottom: 1.4rem;
             left: 1.4rem;
@@ -1089,9 +1200,9 @@ def build_full_html(cards: List[Dict]) -> str:
             font-size: 0.8rem;
             text-decoration: none;
             box-shadow: 0 18px 35px rgba(14, 165, 233, 0.7);
-        }}
+        }
 
-        .whatsapp-publish-fab-icon {{
+        .whatsapp-publish-fab-icon {
             width: 1.4rem;
             height: 1.4rem;
             border-radius: 999px;
@@ -1100,49 +1211,49 @@ def build_full_html(cards: List[Dict]) -> str:
             align-items: center;
             justify-content: center;
             font-size: 1rem;
-        }}
+        }
 
-        .whatsapp-publish-fab-text {{
+        .whatsapp-publish-fab-text {
             white-space: nowrap;
-        }}
+        }
 
 
-        @media (max-width: 768px) {{
-            .header-inner {{
+        @media (max-width: 768px) {
+            .header-inner {
                 flex-direction: column;
                 align-items: flex-start;
-            }}
+            }
 
-            .cards-grid {{
+            .cards-grid {
                 grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
-            }}
+            }
 
-            .search-card {{
+            .search-card {
                 margin-bottom: 0.7rem;
-            }}
+            }
 
-            .copies-modal-dialog {{
+            .copies-modal-dialog {
                 max-height: 95vh;
                 padding: 0.7rem;
-            }}
+            }
 
-            .copies-modal-grid {{
+            .copies-modal-grid {
                 grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            }}
-        }}
+            }
+        }
 
-        @media (max-width: 640px) {{
-            .whatsapp-fab {{
+        @media (max-width: 640px) {
+            .whatsapp-fab {
                 padding: 0.55rem;
-            }}
-            .whatsapp-fab-text {{
+            }
+            .whatsapp-fab-text {
                 display: none;
-            }}
-            .whatsapp-publish-fab-text {{
+            }
+            .whatsapp-publish-fab-text {
                 display: none;
-            }}
+            }
 
-        }}
+        }
     </style>
 </head>
 <body>
@@ -1266,40 +1377,130 @@ def build_full_html(cards: List[Dict]) -> str:
 
 <script>
     const IMAGE_BASE_PATH = "images";
+    const THUMB_BASE_PATH = "images/thumbs";
     const PAGE_SIZE = 30;
-    const cardsData = {cards_json};
+
+    // Las cartas vienen en columnas: {k: campos, ck: campos de cada copia,
+    // kd/ckd: campos que vienen como índice a la tabla s, th: hay
+    // miniaturas, r: filas, s: tabla de strings}. Se rearman como objetos
+    // una sola vez, al cargar.
+    function unpackCards(packed) {
+        const strings = packed.s;
+        const toObject = (fields, dictFields, row) => {
+            const obj = {};
+            for (let i = 0; i < fields.length; i++) {
+                obj[fields[i]] = row[i];
+            }
+            for (const field of dictFields) {
+                obj[field] = strings[obj[field]];
+            }
+            return obj;
+        };
+        return packed.r.map((row) => {
+            const card = toObject(packed.k, packed.kd, row);
+            card.copies = (card.copies || []).map((copy) => toObject(packed.ck, packed.ckd, copy));
+            return card;
+        });
+    }
+
+    const packedCards = """
+
+HTML_TAIL = """;
+    const cardsData = unpackCards(packedCards);
+    const USE_THUMBS = packedCards.th === true;
     const IS_COARSE_POINTER = window.matchMedia && window.matchMedia("(pointer: coarse)").matches;
 
     let filteredCards = [...cardsData];
     let currentPage = 1;
 
+    // Texto de búsqueda de cada carta (nombre, set, formato, idioma, condición
+    // y alias), ya en minúsculas. Se arma una sola vez al cargar la página y
+    // no en cada tecla; searchTexts[i] corresponde a cardsData[i].
+    const searchTexts = cardsData.map((card) => [
+        card.name || "",
+        card.set || "",
+        card.format || "",
+        card.lang || "",
+        card.condition || "",
+        card.searchAliases || ""
+    ].join(" ").toLowerCase());
+
+    // Índice de trigramas: cada trozo de 3 letras -> posiciones (en orden) de
+    // las cartas cuyo searchText lo contiene. Se arma en la primera búsqueda
+    // de 3+ letras; después cada búsqueda revisa con includes() solo las
+    // cartas de la lista más corta entre los trigramas de la consulta, en
+    // vez de todo el catálogo.
+    let trigramIndex = null;
+    function buildTrigramIndex() {
+        const index = new Map();
+        for (let i = 0; i < searchTexts.length; i++) {
+            const text = searchTexts[i];
+            for (let j = 0; j + 3 <= text.length; j++) {
+                const gram = text.slice(j, j + 3);
+                const list = index.get(gram);
+                if (!list) {
+                    index.set(gram, [i]);
+                } else if (list[list.length - 1] !== i) {
+                    list.push(i);
+                }
+            }
+        }
+        return index;
+    }
+
+    function searchCards(query) {
+        if (query.length < 3) {
+            return cardsData.filter((card, i) => searchTexts[i].includes(query));
+        }
+        if (!trigramIndex) {
+            trigramIndex = buildTrigramIndex();
+        }
+        let candidates = null;
+        for (let j = 0; j + 3 <= query.length; j++) {
+            const list = trigramIndex.get(query.slice(j, j + 3));
+            if (!list) {
+                return [];
+            }
+            if (!candidates || list.length < candidates.length) {
+                candidates = list;
+            }
+        }
+        const result = [];
+        for (const i of candidates) {
+            if (searchTexts[i].includes(query)) {
+                result.push(cardsData[i]);
+            }
+        }
+        return result;
+    }
+
     const $ = (id) => document.getElementById(id);
 
-    function debounce(fn, delay) {{
+    function debounce(fn, delay) {
         let timer = null;
-        return (...args) => {{
+        return (...args) => {
             if (timer) clearTimeout(timer);
             timer = setTimeout(() => fn(...args), delay);
-        }};
-    }}
+        };
+    }
 
-    function formatClpJs(value) {{
-        if (value == null || value === "" || isNaN(value)) {{
+    function formatClpJs(value) {
+        if (value == null || value === "" || isNaN(value)) {
             return "Consultar";
-        }}
-        try {{
-            return new Intl.NumberFormat("es-CL", {{
+        }
+        try {
+            return new Intl.NumberFormat("es-CL", {
                 style: "currency",
                 currency: "CLP",
                 minimumFractionDigits: 0,
                 maximumFractionDigits: 0
-            }}).format(value);
-        }} catch (e) {{
+            }).format(value);
+        } catch (e) {
             return "$ " + value;
-        }}
-    }}
+        }
+    }
 
-    function openCopiesModal(card) {{
+    function openCopiesModal(card) {
     const modal = document.getElementById("copiesModal");
     const titleEl = document.getElementById("copiesModalTitle");
     const metaEl = document.getElementById("copiesModalMeta");
@@ -1320,9 +1521,9 @@ def build_full_html(cards: List[Dict]) -> str:
     // Usar las copias si existen, si no usar imagen principal
     const copies = (Array.isArray(card.copies) && card.copies.length)
         ? card.copies
-        : [{{ imageFile: card.imageFile }}];
+        : [{ imageFile: card.imageFile }];
 
-    for (const copy of copies) {{
+    for (const copy of copies) {
         const item = document.createElement("div");
         item.className = "copies-modal-item";
 
@@ -1331,161 +1532,159 @@ def build_full_html(cards: List[Dict]) -> str:
 
         const img = document.createElement("img");
         img.loading = "lazy";
+        img.decoding = "async";
         img.alt = card.name + " - copia";
         img.src = IMAGE_BASE_PATH + "/" + encodeURI(copy.imageFile || card.imageFile || "");
 
         imgWrap.appendChild(img);
         item.appendChild(imgWrap);
         grid.appendChild(item);
-    }}
+    }
 
     bodyEl.appendChild(grid);
 
     modal.style.display = "block";
     document.body.style.overflow = "hidden";
-}}
+}
 
 
-    function closeCopiesModal() {{
+    function closeCopiesModal() {
         const modal = document.getElementById("copiesModal");
-        if (modal) {{
+        if (modal) {
             modal.style.display = "none";
-        }}
+        }
         document.body.style.overflow = "";
-    }}
+    }
 
-    function buildCardElement(card) {{
-        const article = document.createElement("article");
-        article.className = "card";
+    // Escapa texto para meterlo en el HTML de las tarjetas (contenido o
+    // atributo entre comillas dobles).
+    const HTML_ESCAPES = { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" };
+    function escapeHTML(value) {
+        return String(value).replace(/[&<>"']/g, (ch) => HTML_ESCAPES[ch]);
+    }
 
-        const hasMultiple = Array.isArray(card.copies) && card.copies.length > 1;
-        if (hasMultiple) {{
-            article.classList.add("has-multiple");
-        }}
+    const WHATSAPP_BTN_STYLE = "background:#22c55e;color:white;border:none;text-decoration:none;"
+        + "display:inline-flex;align-items:center;gap:0.25rem";
 
-        const imageWrapper = document.createElement("div");
-        imageWrapper.className = "card-image-wrapper";
+    // HTML de una tarjeta. El botón "Ver stock" va marcado con data-stock y
+    // el click se resuelve con un solo listener en la grilla (ver init).
+    function cardHTML(card) {
+        const hasMultiple = Array.isArray(card.copies) && card.copies.length > 1;
 
         const mainImageFile = hasMultiple && card.copies[0].imageFile
             ? card.copies[0].imageFile
             : card.imageFile;
-
-        const img = document.createElement("img");
-        img.loading = "lazy";
-        img.alt = card.name || "Carta Magic";
-        img.src = IMAGE_BASE_PATH + "/" + encodeURI(mainImageFile || card.imageFile || "");
-        imageWrapper.appendChild(img);
-
-        const body = document.createElement("div");
-        body.className = "card-body";
-
-        const nameEl = document.createElement("div");
-        nameEl.className = "card-name";
-        nameEl.textContent = card.name;
-        body.appendChild(nameEl);
-
-        const tags = document.createElement("div");
-        tags.className = "card-tags";
-
-        const setTag = document.createElement("span");
-        setTag.className = "tag";
-        setTag.textContent = card.set || "Set desconocido";
-        tags.appendChild(setTag);
-
-        if (card.format) {{
-            const formatTag = document.createElement("span");
-            formatTag.className = "tag";
-            formatTag.textContent = card.format.toUpperCase();
-            tags.appendChild(formatTag);
-        }}
-
-        if (card.lang) {{
-            const tagLang = document.createElement("span");
-            tagLang.className = "tag";
-            tagLang.textContent = (card.lang || "").toUpperCase();
-            tags.appendChild(tagLang);
-        }}
-
-        body.appendChild(tags);
+        const imgFile = encodeURI(mainImageFile || card.imageFile || "");
+        const imgSrc = IMAGE_BASE_PATH + "/" + imgFile;
+
+        // Con miniaturas, la tarjeta baja la miniatura; data-full guarda la
+        // foto completa por si la miniatura no existe (ver listener de error)
+        let imgAttrs = ' src="' + escapeHTML(imgSrc) + '"';
+        if (USE_THUMBS && imgFile) {
+            const thumbSrc = THUMB_BASE_PATH + "/" + imgFile;
+            imgAttrs = ' src="' + escapeHTML(thumbSrc) + '"'
+                + ' data-full="' + escapeHTML(imgSrc) + '"';
+        }
+
+        let tags = '<span class="tag">' + escapeHTML(card.set || "Set desconocido") + "</span>";
+        // format y lang ya vienen en mayúsculas desde Python
+        if (card.format) {
+            tags += '<span class="tag">' + escapeHTML(card.format) + "</span>";
+        }
+        if (card.lang) {
+            tags += '<span class="tag">' + escapeHTML(card.lang) + "</span>";
+        }
 
         // ----- Footer en 3 filas: precio / Ver stock / WhatsApp
-        const footer = document.createElement("div");
-        footer.className = "card-footer";
-
-        // Fila 1: precio (CK 750 o $XXX)
-        const priceBox = document.createElement("div");
-        const priceMain = document.createElement("div");
-        priceMain.className = "price-main";
-        priceMain.textContent = card.price;   // ya viene con "CK 750" si aplica
-        priceBox.appendChild(priceMain);
-
-        if (card.priceUsdRef) {{
-            const priceRef = document.createElement("div");
-            priceRef.className = "price-ref";
-            priceBox.appendChild(priceRef);
-        }}
-        footer.appendChild(priceBox);
-
-        // Fila 2: botón Ver stock
-        const qtyButton = document.createElement("button");
-        qtyButton.type = "button";
-        qtyButton.className = "qty-pill";
-
-        // usamos la cantidad de copias reales si existe, si no, caemos a quantity
+        // Fila 1: precio (CK 750 o $XXX, ya viene armado desde Python)
+        let priceBox = '<div><div class="price-main">' + escapeHTML(card.price) + "</div>";
+        if (card.priceUsdRef) {
+            priceBox += '<div class="price-ref"></div>';
+        }
+        priceBox += "</div>";
+
+        // Fila 2: botón Ver stock; usamos la cantidad de copias reales si
+        // existe, si no, caemos a quantity
         const copiesCount = (Array.isArray(card.copies) && card.copies.length > 0)
             ? card.copies.length
             : (card.quantity || 1);
-
-        qtyButton.textContent = "Ver stock (" + copiesCount + ")";
-
-        qtyButton.addEventListener("click", (event) => {{
-            event.stopPropagation();
-            openCopiesModal(card);
-        }});
-        footer.appendChild(qtyButton);
-
+        const qtyButton = '<button type="button" class="qty-pill" data-stock>'
+            + "Ver stock (" + copiesCount + ")</button>";
 
         // Fila 3: botón WhatsApp (solo si hay teléfono)
-        if (card.seller_phone) {{
-            const waBtn = document.createElement("a");
-            waBtn.className = "qty-pill";
-            waBtn.style.background = "#22c55e";
-            waBtn.style.color = "white";
-            waBtn.style.border = "none";
-            waBtn.style.textDecoration = "none";
-            waBtn.style.display = "inline-flex";
-            waBtn.style.alignItems = "center";
-            waBtn.style.gap = "0.25rem";
-
+        let waBtn = "";
+        if (card.seller_phone) {
             const msg = encodeURIComponent(
                 "Hola, vi tu carta " + card.name + " en la tienda y me interesa."
             );
-            waBtn.href = "https://wa.me/" + card.seller_phone + "?text=" + msg;
-            waBtn.target = "_blank";
-
-            const icon = document.createElement("span");
-            icon.textContent = "💬";
-            waBtn.appendChild(icon);
-
-            const txt = document.createElement("span");
-            txt.textContent = "WhatsApp";
-            waBtn.appendChild(txt);
-
-            footer.appendChild(waBtn);
-        }}
-
-        body.appendChild(footer);
-
-
-
+            const href = "https://wa.me/" + card.seller_phone + "?text=" + msg;
+            waBtn = '<a class="qty-pill" style="' + WHATSAPP_BTN_STYLE + '" href="' + escapeHTML(href)
+                + '" target="_blank"><span>💬</span><span>WhatsApp</span></a>';
+        }
+
+        return '<article class="card' + (hasMultiple ? " has-multiple" : "") + '">'
+            + '<div class="card-image-wrapper">'
+            // Decodificar fuera del hilo principal: la grilla no espera a las fotos
+            + '<img loading="lazy" decoding="async" alt="' + escapeHTML(card.name || "Carta Magic")
+            + '"' + imgAttrs + ">"
+            + "</div>"
+            + '<div class="card-body">'
+            + '<div class="card-name">' + escapeHTML(card.name || "") + "</div>"
+            + '<div class="card-tags">' + tags + "</div>"
+            + '<div class="card-footer">' + priceBox + qtyButton + waBtn + "</div>"
+            + "</div>"
+            + "</article>";
+    }
 
-        article.appendChild(imageWrapper);
-        article.appendChild(body);
+    // Nodos ya armados de cada tarjeta (carta -> <article>), para que volver a
+    // una página ya vista reutilice los nodos (y sus imágenes ya decodificadas)
+    // en vez de recrearlos. Es un LRU: Map guarda el orden de uso y se
+    // descartan los más antiguos sobre CARD_NODE_CACHE_SIZE.
+    const CARD_NODE_CACHE_SIZE = 300;
+    const cardNodeCache = new Map();
+    const cardByNode = new WeakMap();
+
+    function getCardNodes(pageCards) {
+        const nodes = new Array(pageCards.length);
+        const missing = [];
+        let html = "";
+        for (let i = 0; i < pageCards.length; i++) {
+            const card = pageCards[i];
+            const node = cardNodeCache.get(card);
+            if (node) {
+                // Mover al final = marcar como usado recién
+                cardNodeCache.delete(card);
+                cardNodeCache.set(card, node);
+                nodes[i] = node;
+            } else {
+                missing.push(i);
+                html += cardHTML(card);
+            }
+        }
+
+        // Las tarjetas nuevas se arman como un solo string y las parsea el
+        // navegador de una vez, sin un createElement por cada elemento.
+        if (missing.length) {
+            const holder = document.createElement("div");
+            holder.innerHTML = html;
+            const built = Array.from(holder.children);
+            for (let k = 0; k < missing.length; k++) {
+                const card = pageCards[missing[k]];
+                const node = built[k];
+                cardByNode.set(node, card);
+                cardNodeCache.set(card, node);
+                nodes[missing[k]] = node;
+            }
+        }
 
-        return article;
-    }}
+        for (const card of cardNodeCache.keys()) {
+            if (cardNodeCache.size <= CARD_NODE_CACHE_SIZE) break;
+            cardNodeCache.delete(card);
+        }
+        return nodes;
+    }
 
-    function renderCards() {{
+    function renderCards() {
         const container = document.getElementById("cardsContainer");
         const emptyState = document.getElementById("emptyState");
         const totalCountEl = document.getElementById("totalCount");
@@ -1494,184 +1693,351 @@ def build_full_html(cards: List[Dict]) -> str:
 
         totalCountEl.textContent = String(cardsData.length);
 
-        if (!filteredCards.length) {{
+        if (!filteredCards.length) {
             container.innerHTML = "";
             emptyState.style.display = "block";
             visibleCountEl.textContent = "0";
             pageInfo.textContent = "";
             document.getElementById("pagination").innerHTML = "";
             return;
-        }}
+        }
 
         emptyState.style.display = "none";
 
         const totalPages = Math.max(1, Math.ceil(filteredCards.length / PAGE_SIZE));
-        if (currentPage > totalPages) {{
+        if (currentPage > totalPages) {
             currentPage = totalPages;
-        }}
+        }
 
         const startIdx = (currentPage - 1) * PAGE_SIZE;
         const endIdx = startIdx + PAGE_SIZE;
         const pageCards = filteredCards.slice(startIdx, endIdx);
 
-        container.innerHTML = "";
-        for (const card of pageCards) {{
-            container.appendChild(buildCardElement(card));
-        }}
+        // replaceChildren saca (sin destruir) las tarjetas de la página
+        // anterior y pone las nuevas en una sola operación.
+        container.replaceChildren(...getCardNodes(pageCards));
 
         visibleCountEl.textContent = String(pageCards.length);
         pageInfo.textContent = "Mostrando página " + currentPage + " de " + totalPages;
 
         renderPagination(totalPages);
-    }}
+    }
+
+    // Botón de paginación; `page` va en data-page y el click se resuelve con
+    // un solo listener en #pagination (ver init).
+    function pageButtonHTML(label, page, className, disabled) {
+        return '<button class="' + className + '"'
+            + (page ? ' data-page="' + page + '"' : "")
+            + (disabled ? " disabled" : "")
+            + ">" + label + "</button>";
+    }
 
-    function renderPagination(totalPages) {{
+    function renderPagination(totalPages) {
         const pagination = document.getElementById("pagination");
-        pagination.innerHTML = "";
 
-        if (totalPages <= 1) {{
+        if (totalPages <= 1) {
+            pagination.innerHTML = "";
             return;
-        }}
-
-        const prevBtn = document.createElement("button");
-        prevBtn.className = "page-btn";
-        prevBtn.textContent = "←";
-        prevBtn.disabled = currentPage === 1;
-        prevBtn.onclick = () => {{
-            if (currentPage > 1) {{
-                currentPage--;
-                renderCards();
-            }}
-        }};
-        pagination.appendChild(prevBtn);
+        }
+
+        const dots = '<span class="page-btn">…</span>';
+        let html = pageButtonHTML("←", currentPage - 1, "page-btn", currentPage === 1);
 
         const maxToShow = 7;
         let start = Math.max(1, currentPage - 3);
         let end = Math.min(totalPages, start + maxToShow - 1);
-        if (end - start < maxToShow - 1) {{
+        if (end - start < maxToShow - 1) {
             start = Math.max(1, end - maxToShow + 1);
-        }}
-
-        if (start > 1) {{
-            const first = document.createElement("button");
-            first.className = "page-btn";
-            first.textContent = "1";
-            first.onclick = () => {{
-                currentPage = 1;
-                renderCards();
-            }};
-            pagination.appendChild(first);
-
-            if (start > 2) {{
-                const dots = document.createElement("span");
-                dots.className = "page-btn";
-                dots.textContent = "…";
-                pagination.appendChild(dots);
-            }}
-        }}
-
-        for (let i = start; i <= end; i++) {{
-            const btn = document.createElement("button");
-            btn.className = "page-btn" + (i === currentPage ? " active" : "");
-            btn.textContent = String(i);
-            if (i !== currentPage) {{
-                btn.onclick = () => {{
-                    currentPage = i;
-                    renderCards();
-                }};
-            }} else {{
-                btn.disabled = true;
-            }}
-            pagination.appendChild(btn);
-        }}
-
-        if (end < totalPages) {{
-            if (end < totalPages - 1) {{
-                const dots = document.createElement("span");
-                dots.className = "page-btn";
-                dots.textContent = "…";
-                pagination.appendChild(dots);
-            }}
-
-            const last = document.createElement("button");
-            last.className = "page-btn";
-            last.textContent = String(totalPages);
-            last.onclick = () => {{
-                currentPage = totalPages;
-                renderCards();
-            }};
-            pagination.appendChild(last);
-        }}
-
-        const nextBtn = document.createElement("button");
-        nextBtn.className = "page-btn";
-        nextBtn.textContent = "→";
-        nextBtn.disabled = currentPage === totalPages;
-        nextBtn.onclick = () => {{
-            if (currentPage < totalPages) {{
-                currentPage++;
-                renderCards();
-            }}
-        }};
-        pagination.appendChild(nextBtn);
-    }}
+        }
 
-    function applyFilters() {{
+        if (start > 1) {
+            html += pageButtonHTML("1", 1, "page-btn", false);
+            if (start > 2) {
+                html += dots;
+            }
+        }
+
+        for (let i = start; i <= end; i++) {
+            html += i === currentPage
+                ? pageButtonHTML(String(i), 0, "page-btn active", true)
+                : pageButtonHTML(String(i), i, "page-btn", false);
+        }
+
+        if (end < totalPages) {
+            if (end < totalPages - 1) {
+                html += dots;
+            }
+            html += pageButtonHTML(String(totalPages), totalPages, "page-btn", false);
+        }
+
+        html += pageButtonHTML("→", currentPage + 1, "page-btn", currentPage === totalPages);
+
+        pagination.innerHTML = html;
+    }
+
+    function applyFilters() {
         const input = document.getElementById("searchInput");
         const query = (input.value || "").trim().toLowerCase();
 
-        if (!query) {{
+        if (!query) {
             filteredCards = [...cardsData];
-        }} else {{
-            filteredCards = cardsData.filter((card) => {{
-                const haystack = [
-                    card.name || "",
-                    card.set || "",
-                    card.format || "",
-                    card.lang || "",
-                    card.condition || "",
-                    card.searchAliases || ""   
-                ]
-                    .join(" ")
-                    .toLowerCase();
-
-                return haystack.includes(query);
-            }});
-        }}
+        } else {
+            filteredCards = searchCards(query);
+        }
 
         currentPage = 1;
-        renderCards();
-    }}
+        scheduleRender();
+    }
 
-    function init() {{
+    // El render de una búsqueda se agenda para el próximo frame: si llegan
+    // varias antes de que se pinte, el DOM se actualiza una sola vez.
+    let renderScheduled = false;
+    function scheduleRender() {
+        if (renderScheduled) return;
+        renderScheduled = true;
+        requestAnimationFrame(() => {
+            renderScheduled = false;
+            renderCards();
+        });
+    }
+
+    function init() {
         const input = document.getElementById("searchInput");
         input.addEventListener("input", debounce(applyFilters, 200));
 
+        // Clicks de "Ver stock" y de la paginación: un listener por contenedor
+        // en vez de uno por botón (los botones se recrean en cada render).
+        document.getElementById("cardsContainer").addEventListener("click", (event) => {
+            const btn = event.target.closest("[data-stock]");
+            if (!btn) return;
+            event.stopPropagation();
+            const card = cardByNode.get(btn.closest("article"));
+            if (card) {
+                openCopiesModal(card);
+            }
+        });
+
+        // Si falta una miniatura (make_thumbnails no pudo generarla), se usa
+        // la foto completa. "error" no burbujea: se escucha en captura.
+        document.getElementById("cardsContainer").addEventListener("error", (event) => {
+            const img = event.target;
+            if (img.tagName !== "IMG" || !img.dataset.full) return;
+            const full = img.dataset.full;
+            delete img.dataset.full;
+            img.src = full;
+        }, true);
+
+        document.getElementById("pagination").addEventListener("click", (event) => {
+            const btn = event.target.closest("[data-page]");
+            if (!btn || btn.disabled) return;
+            const page = Number(btn.dataset.page);
+            if (page >= 1 && page !== currentPage) {
+                currentPage = page;
+                renderCards();
+            }
+        });
+
         const modalClose = document.getElementById("copiesModalClose");
         const modalBackdrop = document.getElementById("copiesModalBackdrop");
 
-        if (modalClose) {{
+        if (modalClose) {
             modalClose.addEventListener("click", closeCopiesModal);
-        }}
-        if (modalBackdrop) {{
-            modalBackdrop.addEventListener("click", (e) => {{
-                if (e.target === modalBackdrop) {{
+        }
+        if (modalBackdrop) {
+            modalBackdrop.addEventListener("click", (e) => {
+                if (e.target === modalBackdrop) {
                     closeCopiesModal();
-                }}
-            }});
-        }}
+                }
+            });
+        }
 
         filteredCards = [...cardsData];
         currentPage = 1;
         renderCards();
-    }}
+    }
 
     document.addEventListener("DOMContentLoaded", init);
 </script>
 </body>
 </html>
 """
-    return template
+
+
+def build_full_html(cards: List[Dict]) -> str:
+    """
+    Construye el HTML completo de la tienda, con:
+    - Paginación en el front.
+    - Modal grande para ver copias.
+    - Agrupación de cartas por nombre/set/condición/foil/formato ignorando idioma.
+    - Botón flotante de WhatsApp general.
+    - Botón de WhatsApp POR COPIA dentro del modal (usa sellerPhone).
+    """
+    head, tail = page_template()
+    return head + "".join(iter_cards_json(cards)) + tail
+
+
+@lru_cache(maxsize=1)
+def page_template() -> Tuple[str, str]:
+    """
+    Devuelve (HTML_HEAD, HTML_TAIL), con el <style> y el <script> minificados
+    si MINIFY_HTML está activo. El <script> queda partido entre las dos
+    mitades (el JSON de cartas va al medio), así que cada trozo de JS se
+    minifica por separado. Se calcula una sola vez por corrida.
+    """
+    if not MINIFY_HTML:
+        return HTML_HEAD, HTML_TAIL
+
+    style_start = HTML_HEAD.index("<style>") + len("<style>")
+    style_end = HTML_HEAD.index("</style>")
+    script_start = HTML_HEAD.index("<script>") + len("<script>")
+    head = (
+        HTML_HEAD[:style_start]
+        + rcssmin.cssmin(HTML_HEAD[style_start:style_end])
+        + HTML_HEAD[style_end:script_start]
+        + rjsmin.jsmin(HTML_HEAD[script_start:])
+    )
+
+    script_end = HTML_TAIL.index("</script>")
+    tail = rjsmin.jsmin(HTML_TAIL[:script_end]) + HTML_TAIL[script_end:]
+    return head, tail
+
+
+def iter_cards_json(cards: List[Dict]) -> Iterator[str]:
+    """
+    Serializa la lista de cartas como JSON por partes (una carta por trozo,
+    con orjson o el encoder en C de json), sin espacios después de "," y ":"
+    para que la página pese menos. "<" se escribe como \\u003c: el JSON va
+    dentro de un <script> y un nombre con "</script>" o "<!--" cortaría la
+    página.
+
+    Formato: {"k": CARD_JSON_KEYS, "ck": COPY_JSON_KEYS, "kd":
+    CARD_DICT_KEYS, "ckd": COPY_DICT_KEYS, "th": miniaturas, "r": [fila, ...],
+    "s": [string, ...]}, con cada carta (y cada copia) como lista de valores
+    en ese orden. Las columnas de kd/ckd llevan el índice del valor en "s",
+    que se va llenando mientras se escriben las filas y por eso va al final.
+    "th" dice si copy_images genera miniaturas (THUMBNAILS_ENABLED).
+    """
+    yield '{"k":%s,"ck":%s,"kd":%s,"ckd":%s,"th":%s,"r":[' % (
+        _encode_card(list(CARD_JSON_KEYS)),
+        _encode_card(list(COPY_JSON_KEYS)),
+        _encode_card(list(CARD_DICT_KEYS)),
+        _encode_card(list(COPY_DICT_KEYS)),
+        "true" if THUMBNAILS_ENABLED else "false",
+    )
+
+    string_ids: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        idx = string_ids.get(value)
+        if idx is None:
+            idx = string_ids[value] = len(string_ids)
+        return idx
+
+    for i, card in enumerate(cards):
+        if i:
+            yield ","
+        row = [card[key] for key in CARD_JSON_KEYS]
+        for col in _CARD_DICT_COLUMNS:
+            row[col] = string_id(row[col])
+        copies = []
+        for copy in card["copies"]:
+            copy_row = [copy[key] for key in COPY_JSON_KEYS]
+            for col in _COPY_DICT_COLUMNS:
+                copy_row[col] = string_id(copy_row[col])
+            copies.append(copy_row)
+        row[_COPIES_COLUMN] = copies
+        yield _encode_card(row).replace("<", "\\u003c")
+
+    # Los dicts conservan el orden de inserción: la posición es el índice
+    yield '],"s":%s}' % _encode_card(list(string_ids)).replace("<", "\\u003c")
+
+
+def write_full_html(path: Path, cards: List[Dict]) -> None:
+    """
+    Igual que build_full_html, pero escribe directo al archivo: el JSON de
+    cartas se vuelca por partes y el HTML completo nunca se arma como un
+    solo string en memoria.
+
+    Se escribe primero a un .tmp y luego se reemplaza con os.replace, así
+    quien abra la página mientras se genera nunca ve un HTML a medias.
+    """
+    head, tail = page_template()
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8", buffering=HTML_WRITE_BUFFER) as f:
+            f.write(head)
+            for chunk in iter_cards_json(cards):
+                f.write(chunk)
+            f.write(tail)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Escribe data en path pasando por un .tmp + os.replace."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_compressed_copies(path: Path) -> List[Path]:
+    """
+    Deja junto al HTML una copia comprimida (.html.gz y, si está brotli,
+    .html.br) para que el servidor estático la entregue con
+    Content-Encoding sin comprimir en cada visita. El gzip se escribe con
+    mtime=0 para que el archivo no cambie (ni genere commit) si el HTML
+    es el mismo.
+    """
+    data = path.read_bytes()
+    written = []
+
+    gz_path = path.with_name(path.name + ".gz")
+    write_bytes_atomic(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(gz_path)
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + ".br")
+        write_bytes_atomic(br_path, brotli.compress(data, quality=11))
+        written.append(br_path)
+
+    return written
+
+
+def html_signature(csv_path: Path) -> str:
+    """
+    Firma de lo que determina el HTML: mtime y tamaño del CSV, más el mtime
+    de este script (la plantilla vive aquí, así que editarla también obliga
+    a regenerar), si se minifica, si hay miniaturas y los textos de precio
+    <VENDEDOR>_CK_USD del .env (ver prepare_cards_for_frontend).
+    """
+    if not csv_path.exists():
+        return ""  # load_inventory se encarga del error
+    csv_stat = csv_path.stat()
+    script_mtime = Path(__file__).stat().st_mtime_ns
+    ck_labels = "\n".join(
+        f"{k}={v}" for k, v in sorted(os.environ.items()) if k.endswith("_CK_USD")
+    )
+    ck_hash = hashlib.sha1(ck_labels.encode("utf-8")).hexdigest()[:12]
+    return (
+        f"{csv_stat.st_mtime_ns}:{csv_stat.st_size}:{script_mtime}:"
+        f"{int(MINIFY_HTML)}:{int(THUMBNAILS_ENABLED)}:{ck_hash}"
+    )
+
+
+def html_is_up_to_date(signature: str) -> bool:
+    """True si el HTML ya existe y se generó con la misma firma."""
+    if not signature or not OUTPUT_HTML.exists():
+        return False
+    try:
+        return OUTPUT_HTML_STAMP.read_text(encoding="utf-8").strip() == signature
+    except OSError:
+        return False
 
 
 # ========== COPIA DE IMÁGENES ==========
@@ -1703,6 +2069,75 @@ def copy_images():
 
     print(f"[INFO] Se copiaron {count} imágenes a {DEPLOY_IMAGES_DIR}")
 
+    if THUMBNAILS_ENABLED:
+        make_thumbnails()
+
+
+def thumbnail_is_current(src, dst):
+    """
+    True si la miniatura dst tiene el tamaño que daría THUMB_WIDTH. Solo lee
+    la cabecera de la imagen; la foto original se abre únicamente cuando la
+    miniatura quedó más chica que la caja (fotos pequeñas o THUMB_WIDTH
+    mayor que el de la corrida anterior).
+    """
+    try:
+        with Image.open(dst) as im:
+            width, height = im.size
+        if width == THUMB_WIDTH or height == THUMB_WIDTH * 2:
+            return True
+        if width > THUMB_WIDTH or height > THUMB_WIDTH * 2:
+            return False
+        with Image.open(src) as im:
+            src_size = im.size
+            # Orientaciones EXIF 5-8 giran 90°: la miniatura queda traspuesta
+            if im.getexif().get(0x0112) in (5, 6, 7, 8):
+                src_size = src_size[::-1]
+        return src_size == (width, height)
+    except OSError:
+        return False
+
+
+def make_thumbnails():
+    """
+    Genera en DEPLOY_THUMBS_DIR una miniatura (THUMB_WIDTH de ancho, mismo
+    nombre y formato) de cada imagen de DEPLOY_IMAGES_DIR. Solo se rehacen
+    las que no existen, son más viejas que la foto o se generaron con otro
+    THUMB_WIDTH, y se borran las de fotos que ya no están. Si una miniatura
+    falla no queda archivo: la grilla usa la foto completa.
+    """
+    DEPLOY_THUMBS_DIR.mkdir(parents=True, exist_ok=True)
+
+    names = set()
+    made = 0
+    for src in DEPLOY_IMAGES_DIR.iterdir():
+        if not src.is_file():
+            continue
+        names.add(src.name)
+        dst = DEPLOY_THUMBS_DIR / src.name
+        if (
+            dst.exists()
+            and dst.stat().st_mtime >= src.stat().st_mtime
+            and thumbnail_is_current(src, dst)
+        ):
+            continue
+        try:
+            with Image.open(src) as im:
+                # Respetar la orientación EXIF de la foto (la miniatura no la guarda)
+                im = ImageOps.exif_transpose(im)
+                im.thumbnail((THUMB_WIDTH, THUMB_WIDTH * 2))
+                im.save(dst, quality=80, optimize=True)
+            made += 1
+        except OSError as e:
+            print(f"[WARN] No se pudo generar la miniatura de {src.name}: {e}")
+            if dst.exists():
+                dst.unlink()
+
+    for thumb in DEPLOY_THUMBS_DIR.iterdir():
+        if thumb.is_file() and thumb.name not in names:
+            thumb.unlink()
+
+    print(f"[INFO] Miniaturas nuevas: {made} (en {DEPLOY_THUMBS_DIR})")
+
 
 # ========== GIT: ADD / COMMIT / PUSH ==========
 
@@ -1746,28 +2181,37 @@ def git_commit_and_push():
 
 # ========== MAIN ==========
 
-def main():
+def main(force: bool = False):
     """
     Genera el HTML y copia las imágenes usando el inventario YA construido
     y con precios YA actualizados.
 
+    Si el CSV no cambió desde la última corrida (ver html_signature) no se
+    regenera el HTML, salvo con force=True.
+
     IMPORTANTE:
     - Este script YA NO ejecuta auto_etiquetar_renombrar.py
       ni construir_inventario_desde_fotos.py.
     - Esos pasos deben hacerse antes (por ejemplo, desde el .bat
       actualizar_tienda_magic.bat en modo "one click").
     """
-    # 1) Cargar inventario existente (debe incluir columnas de precio)
-    rows = load_inventory(INVENTORY_CSV)
-
-    # 2) Preparar datos para el frontend (agrupando copias e idiomas)
-    cards = prepare_cards_for_frontend(rows)
-
-    # 3) Construir HTML
-    full_html = build_full_html(cards)
-    DEPLOY_DIR.mkdir(parents=True, exist_ok=True)
-    OUTPUT_HTML.write_text(full_html, encoding="utf-8")
-    print(f"[INFO] HTML generado en: {OUTPUT_HTML}")
+    signature = html_signature(INVENTORY_CSV)
+    if not force and html_is_up_to_date(signature):
+        print(f"[INFO] Inventario sin cambios, se mantiene: {OUTPUT_HTML}")
+    else:
+        # 1) y 2) Leer el inventario (debe incluir columnas de precio) y
+        # prepararlo para el frontend en una sola pasada, fila a fila
+        cards = prepare_cards_for_frontend(load_inventory(INVENTORY_CSV))
+
+        # 3) Construir HTML (se escribe directo al archivo, por partes)
+        DEPLOY_DIR.mkdir(parents=True, exist_ok=True)
+        write_full_html(OUTPUT_HTML, cards)
+        print(f"[INFO] HTML generado en: {OUTPUT_HTML}")
+        for compressed in write_compressed_copies(OUTPUT_HTML):
+            print(f"[INFO] Copia comprimida: {compressed}")
+
+        # La firma se guarda solo después de escribir todo el HTML
+        OUTPUT_HTML_STAMP.write_text(signature, encoding="utf-8")
 
     # 4) Copiar imágenes a la carpeta del sitio
     copy_images()
@@ -1779,4 +2223,11 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Genera el HTML de la tienda y lo publica.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenera el HTML aunque el inventario no haya cambiado.",
+    )
+    args = parser.parse_args()
+    main(force=args.force)
@@ -26,9 +26,8 @@ import base64
 from pathlib import Path
 from typing import Dict, Any, Set
 
-import requests
-
 from config_tienda import RAW_DIR, PROCESADAS_DIR, PROJECT_ROOT
+from scryfall_http import json_loads_response, make_scryfall_session
 
 # Si usas python-dotenv, puedes cargar el .env aquí
 try:
@@ -49,6 +48,11 @@ except ImportError:
 # Modelo de visión a usar (ajusta si quieres otro)
 OPENAI_VISION_MODEL = os.getenv("OPENAI_VISION_MODEL", "gpt-4.1-mini")
 
+# Sesión HTTP compartida para Scryfall (ver scryfall_http.py). Este script
+# consulta de a una carta con SCRYFALL_RATE_LIMIT_SECONDS de pausa, muy bajo
+# el límite de Scryfall.
+SESSION = make_scryfall_session()
+
 # Límite de peticiones a Scryfall (respetar 10 req/seg máx; aquí vamos mucho más lento)
 SCRYFALL_RATE_LIMIT_SECONDS = 0.12
 
@@ -162,9 +166,11 @@ def analyze_image_with_vision(image_path: Path) -> Dict[str, Any]:
 def fetch_card_from_scryfall(name_detected: str, lang: str) -> Dict[str, Any]:
     """
     Consulta Scryfall para obtener información de la carta:
-    - Usa primero búsqueda exacta en el idioma detectado.
-    - Si falla, fuzzy en ese idioma.
-    - Si sigue fallando, intenta en inglés.
+    - Una sola búsqueda en el idioma detectado que combina exacto y fuzzy
+      con OR: (!"Nombre" or Nombre) lang:xx
+    - Si falla, la misma búsqueda sin idioma.
+    - Entre los resultados se prefiere la coincidencia exacta de nombre
+      (name o printed_name); si no hay, el primero.
     Se usa para:
       - nombre oficial
       - printed_name
@@ -172,31 +178,39 @@ def fetch_card_from_scryfall(name_detected: str, lang: str) -> Dict[str, Any]:
     PERO: NUNCA se usa el 'set' que devuelve Scryfall para renombrar.
     """
     base_url = "https://api.scryfall.com/cards/search"
+    name_lower = name_detected.lower()
 
-    # 1) Exacto en idioma detectado
-    query = f'!"{name_detected}" lang:{lang}'
-    for q in [query, f'{name_detected} lang:{lang}', f'!"{name_detected}"', name_detected]:
+    # 1) Exacto o fuzzy en idioma detectado; 2) exacto o fuzzy en cualquier idioma
+    combined = f'(!"{name_detected}" or {name_detected})'
+    for q in [f"{combined} lang:{lang}", combined]:
         try:
-            resp = requests.get(base_url, params={"q": q}, timeout=12)
+            resp = SESSION.get(base_url, params={"q": q}, timeout=12)
         except Exception:
             continue
 
         if resp.status_code != 200:
             continue
 
-        data = resp.json()
-        if data.get("object") == "list" and data.get("data"):
-            return data["data"][0]
-
-    # 2) Intento con /cards/named en inglés
+        data = json_loads_response(resp)
+        cards = data.get("data") if data.get("object") == "list" else None
+        if cards:
+            for card in cards:
+                if (
+                    (card.get("name") or "").lower() == name_lower
+                    or (card.get("printed_name") or "").lower() == name_lower
+                ):
+                    return card
+            return cards[0]
+
+    # 3) Intento con /cards/named en inglés
     try:
-        resp = requests.get(
+        resp = SESSION.get(
             "https://api.scryfall.com/cards/named",
             params={"exact": name_detected},
             timeout=12,
         )
         if resp.status_code == 200:
-            return resp.json()
+            return json_loads_response(resp)
     except Exception:
         pass
 
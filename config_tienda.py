@@ -51,6 +51,22 @@ INVENTORY_CSV: Path = PROJECT_ROOT / "inventario_cartas.csv"
 # CSV donde se registran problemas / errores de construcción de inventario
 INVENTORY_ERRORES_CSV: Path = PROJECT_ROOT / "inventario_cartas_errores.csv"
 
+# =========================
+#  CACHES
+# =========================
+
+# Cache en disco de respuestas de Scryfall (construir_inventario_desde_fotos.py).
+# Se puede borrar sin problema: se vuelve a llenar en la siguiente corrida.
+SCRYFALL_CACHE_JSON: Path = PROJECT_ROOT / "scryfall_cache.json"
+
+# Archivo "default_cards" de Scryfall (todas las cartas en un solo JSON), usado
+# por construir_inventario_desde_fotos.py --bulk. Se vuelve a bajar a diario.
+SCRYFALL_BULK_JSON: Path = PROJECT_ROOT / "scryfall_default_cards.json"
+
+# Firma (mtime/tamaño) del CSV con que se generó el HTML por última vez
+# (actualizar_tienda.py). Si no cambió, no se vuelve a generar la página.
+OUTPUT_HTML_STAMP: Path = PROJECT_ROOT / "tienda_html.stamp"
+
 # =========================
 #  SALIDA WEB / DEPLOY
 # =========================
@@ -64,6 +80,9 @@ OUTPUT_HTML: Path = DEPLOY_DIR / "index.html"
 # Carpeta donde se copian las imágenes para la web
 DEPLOY_IMAGES_DIR: Path = DEPLOY_DIR / "images"
 
+# Miniaturas de la grilla (actualizar_tienda.py, solo si está Pillow)
+DEPLOY_THUMBS_DIR: Path = DEPLOY_IMAGES_DIR / "thumbs"
+
 # =========================
 #  REPO GIT
 # =========================
@@ -98,9 +117,13 @@ if __name__ == "__main__":
     print("PROCESADAS_DIR      :", PROCESADAS_DIR)
     print("INVENTORY_CSV       :", INVENTORY_CSV)
     print("INVENTORY_ERRORES_CSV:", INVENTORY_ERRORES_CSV)
+    print("SCRYFALL_CACHE_JSON :", SCRYFALL_CACHE_JSON)
+    print("SCRYFALL_BULK_JSON  :", SCRYFALL_BULK_JSON)
+    print("OUTPUT_HTML_STAMP   :", OUTPUT_HTML_STAMP)
     print("DEPLOY_DIR          :", DEPLOY_DIR)
     print("OUTPUT_HTML         :", OUTPUT_HTML)
     print("DEPLOY_IMAGES_DIR   :", DEPLOY_IMAGES_DIR)
+    print("DEPLOY_THUMBS_DIR   :", DEPLOY_THUMBS_DIR)
     print("GIT_REPO_DIR        :", GIT_REPO_DIR)
 
     ensure_directories()
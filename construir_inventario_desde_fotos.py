@@ -1,12 +1,22 @@
+import argparse
 import csv
+import json
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple, List
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Mapping, Optional, Tuple, List
 import re
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 import requests
 
-from config_tienda import PROCESADAS_DIR, INVENTORY_CSV, INVENTORY_ERRORES_CSV
+from config_tienda import (
+    PROCESADAS_DIR, INVENTORY_CSV, INVENTORY_ERRORES_CSV, SCRYFALL_CACHE_JSON, SCRYFALL_BULK_JSON,
+)
+from scryfall_http import json_loads_bytes, json_loads_response, make_scryfall_session
 from dotenv import load_dotenv
 
 from config_tienda import PROJECT_ROOT, INVENTORY_CSV
@@ -14,6 +24,13 @@ from config_tienda import PROJECT_ROOT, INVENTORY_CSV
 # Cargar .env desde la carpeta del proyecto
 load_dotenv(PROJECT_ROOT / ".env")
 
+# ijson es opcional: si está instalado, el bulk default_cards (--bulk) se lee
+# carta por carta en vez de cargar el JSON completo en memoria.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # ============================================================
 #  MODO A: "Procesadas como verdad"
 #  - El stock (quantity) se obtiene SIEMPRE del nombre del archivo
@@ -25,16 +42,64 @@ load_dotenv(PROJECT_ROOT / ".env")
 # ============================================================
 
 SCRYFALL_API = "https://api.scryfall.com"
-USD_TO_CLP = float(os.getenv("USD_TO_CLP", 900))
 
-# Multiplicadores por condición
-CONDITION_MULTIPLIERS = {
-    "NM": 1.0,
-    "EX": 0.9,
-    "SP": 0.8,
-    "MP": 0.7,
-    "HP": 0.5,
-}
+# Sesión HTTP compartida para Scryfall (ver scryfall_http.py)
+SESSION = make_scryfall_session()
+
+# Scryfall pide como máximo ~10 peticiones por segundo. Las consultas se
+# hacen desde varios hilos (ver fetch_all_cards), así que el intervalo
+# mínimo entre peticiones se reparte con un lock común.
+SCRYFALL_MIN_INTERVAL = 0.1
+# Reintentos ante 429 (Too Many Requests), esperando lo que diga Retry-After
+SCRYFALL_429_RETRIES = 3
+# Hilos de fetch_all_cards. Más hilos no superan el límite de 10 req/s (el
+# throttle los ordena), solo ocultan mejor la latencia de cada petición.
+SCRYFALL_WORKERS = max(1, int(os.getenv("SCRYFALL_WORKERS", 8)))
+# Máximo de identificadores por POST a /cards/collection (límite de Scryfall)
+SCRYFALL_COLLECTION_BATCH = 75
+_scryfall_lock = threading.Lock()
+_scryfall_next_slot = 0.0
+
+# Cache en disco de Scryfall (SCRYFALL_CACHE_JSON): vigencia en segundos de
+# una carta encontrada y de una búsqueda sin resultado.
+SCRYFALL_CACHE_TTL_HIT = 7 * 24 * 3600
+SCRYFALL_CACHE_TTL_MISS = 24 * 3600
+
+# Resultado de scryfall_search cuando la carta no se pudo consultar (error de
+# red, timeout, 5xx) en vez de "no existe" (None). Es falsy, así que la fila
+# igual queda como error, pero no se guarda en la cache en disco: un corte de
+# Scryfall no debe marcar las cartas como no encontradas por 24 h.
+SCRYFALL_LOOKUP_FAILED: Mapping[str, Any] = MappingProxyType({})
+
+# Archivo bulk "default_cards" (opción --bulk): Scryfall lo regenera una vez
+# al día, así que no se vuelve a bajar si tiene menos de esta antigüedad.
+SCRYFALL_BULK_MAX_AGE = 24 * 3600
+
+# Campos de la carta de Scryfall que usa este script; solo esos se guardan
+# en la cache para que el archivo no crezca innecesariamente.
+SCRYFALL_CACHE_FIELDS = (
+    "name", "printed_name", "set", "lang", "legalities",
+    "prices", "finishes", "foil", "nonfoil",
+)
+
+USD_TO_CLP = float(os.getenv("USD_TO_CLP", 900))
+# Piso mínimo de precio en CLP (mismo nombre que en actualizar_precios_mtgjson.py)
+PRICE_MIN_CLP = float(os.getenv("PRICE_MIN_CLP", 500))
+
+# Horas durante las que una fila del CSV anterior se considera fresca y se
+# reutiliza sin volver a consultar Scryfall (0 = consultar siempre). Se mide
+# desde que se resolvió su carta (fecha de la entrada en la cache en disco),
+# no desde el mtime del CSV, que se reescribe en cada corrida.
+REUSE_EXISTING_TTL_HOURS = float(os.getenv("REUSE_EXISTING_TTL_HOURS", 24))
+
+# Multiplicadores por condición (solo lectura). El factor se resuelve una
+# sola vez al parsear el nombre del archivo (ver parse_filename -> "condition_factor").
+CONDITION_MULTIPLIERS = MappingProxyType({
+    "NM": 1.00, "M": 1.00,
+    "EX": 0.90, "SP": 0.90,
+    "VG": 0.80, "MP": 0.80,
+    "HP": 0.60, "POOR": 0.40,
+})
 
 # Orden de columnas del CSV
 HEADERS = [
@@ -57,8 +122,67 @@ HEADERS = [
     "seller_phone",
 ]
 
+# Extensiones de imagen que se consideran parte del inventario
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+# Buffer de escritura para los CSV de salida (1 MiB): menos syscalls write()
+# que con el buffer por defecto de 8 KiB en inventarios grandes.
+CSV_WRITE_BUFFER = 1 << 20
+
+# Columnas del CSV de errores
+ERROR_HEADERS = ["image_url", "error", "extra"]
+
+# Cada cuántos errores se fuerza un flush del CSV de errores
+ERROR_FLUSH_EVERY = 50
+
 SELLER_INVENTORIES_DIR: Path = INVENTORY_CSV.parent / "inventarios_vendedores"
 
+# Formatos en orden de prioridad (clave de Scryfall, etiqueta para el CSV)
+_FORMAT_PRIORITY: Tuple[Tuple[str, str], ...] = (
+    ("modern", "Modern"),
+    ("pioneer", "Pioneer"),
+    ("legacy", "Legacy"),
+    ("vintage", "Vintage"),
+    ("commander", "Commander"),
+    ("standard", "Standard"),
+    ("pauper", "Pauper"),
+    ("alchemy", "Alchemy"),
+    ("historic", "Historic"),
+)
+_LEGAL = "legal"
+
+# Patrón de nombre de archivo: "Nombre - SET - lang - COND[_FOIL] - qty..."
+# Cada campo es un tramo entre separadores " - " (equivale a
+# stem.split(" - "): el tramo no puede contener " - "). Los espacios
+# sobrantes de cada campo se recortan después con strip().
+# Lo que venga después del primer número de qty (ej: " (2)") se ignora.
+# La segunda alternativa cubre el caso con set vacío
+#   "<Nombre> - - es - NM - 1"
+# que el split deja en 4 tramos: ['<Nombre>', '- es', 'NM', '1'].
+_FIELD = r"(?:(?! - ).)*"
+_FILENAME_RE = re.compile(
+    rf"(?P<name>{_FIELD}) - (?:"
+    rf"(?P<set>{_FIELD}) - (?P<lang>{_FIELD}) - (?P<cond>{_FIELD}) - \s*(?P<qty>\d+)"
+    rf"|(?:(?! - )\s)*-(?P<lang2>{_FIELD}) - (?P<cond2>{_FIELD}) - \s*(?P<qty2>\d+){_FIELD}$"
+    r")",
+    re.DOTALL,
+)
+
+# Slug del archivo por vendedor: letras, números, _ y - (ver write_seller_inventories)
+_SLUG_RE = re.compile(r"[^0-9A-Za-z_-]+")
+
+# Escalera de búsquedas de scryfall_search, en orden: (plantilla, requiere
+# set, requiere idioma). Primero nombre exacto y luego nombre normal en cada
+# nivel: idioma + set, mismo set sin idioma, búsqueda global.
+_SEARCH_QUERY_TEMPLATES: Tuple[Tuple[str, bool, bool], ...] = (
+    ('!"{name}" set:{set} lang:{lang} game:paper -is:token', True, True),
+    ("{name} set:{set} lang:{lang} game:paper -is:token", True, True),
+    ('!"{name}" set:{set} game:paper -is:token', True, False),
+    ("{name} set:{set} game:paper -is:token", True, False),
+    ('!"{name}" game:paper -is:token', False, False),
+    ("{name} game:paper -is:token", False, False),
+)
+
 # ========== UTILIDADES BÁSICAS ==========
 
 def safe_float(v: Any) -> Optional[float]:
@@ -70,69 +194,22 @@ def safe_float(v: Any) -> Optional[float]:
         return None
 
 
-def estimate_price_with_condition(usd_normal: Optional[str],
-                                  usd_foil: Optional[str],
-                                  condition: str,
-                                  is_foil: bool) -> Tuple[str, str]:
+def adjust_price(base_usd: float, condition_factor: float) -> Tuple[float, int]:
     """
-    Devuelve (price_usd_ref, price_clp) siempre que exista ALGÚN precio en USD.
-    Si no hay ningún precio USD -> ("", "") y el front mostrará "Consultar".
+    Núcleo numérico del precio: devuelve (usd ajustado por condición,
+    CLP redondeado). Aplica el piso PRICE_MIN_CLP solo a precios positivos.
     """
-
-    # Elegimos base según foil / no foil, pero sin matar el precio
-    base_str = None
-
-    if is_foil:
-        base_str = usd_foil or usd_normal
-    else:
-        base_str = usd_normal or usd_foil
-
-    if not base_str:
-        return "", ""   # no hay ningún precio USD disponible
-
-    try:
-        base_usd = float(base_str)
-    except ValueError:
-        return "", ""
-
-    CONDITION_MULTIPLIERS = {
-        "NM": 1.00, "M": 1.00,
-        "EX": 0.90, "SP": 0.90,
-        "VG": 0.80, "MP": 0.80,
-        "HP": 0.60, "POOR": 0.40,
-    }
-
-    cond_key = (condition or "NM").upper()
-    multiplier = CONDITION_MULTIPLIERS.get(cond_key, 1.0)
-
-    adjusted_usd = base_usd * multiplier
+    adjusted_usd = base_usd * condition_factor
     adjusted_clp = adjusted_usd * USD_TO_CLP
-
-    # Piso mínimo de precio
-    if adjusted_clp > 0 and adjusted_clp < 500:
-        adjusted_clp = 500
-
-    price_usd_ref = f"{adjusted_usd:.2f}"
-    price_clp = str(int(round(adjusted_clp)))
-
-    return price_usd_ref, price_clp
+    if 0 < adjusted_clp < PRICE_MIN_CLP:
+        adjusted_clp = PRICE_MIN_CLP
+    return adjusted_usd, int(round(adjusted_clp))
 
 
 def pick_format(legalities: Dict[str, str]) -> str:
-    priority = [
-        "modern",
-        "pioneer",
-        "legacy",
-        "vintage",
-        "commander",
-        "standard",
-        "pauper",
-        "alchemy",
-        "historic",
-    ]
-    for fmt in priority:
-        if legalities.get(fmt) == "legal":
-            return fmt.capitalize()
+    for fmt, label in _FORMAT_PRIORITY:
+        if legalities.get(fmt) == _LEGAL:
+            return label
     return "Casual"
 
 
@@ -160,54 +237,33 @@ def parse_filename(filename: str) -> Optional[Dict[str, Any]]:
     donde el SET viene vacío.
     """
 
-    stem = Path(filename).stem
-    parts = [p.strip() for p in stem.split(" - ")]
-
-    # Caso normal: al menos 5 partes => nombre, set, lang, cond, qty
-    if len(parts) >= 5:
-        name_raw, set_code, lang, cond_part, qty_str = parts[:5]
+    m = _FILENAME_RE.match(Path(filename).stem)
+    if not m:
+        # Cualquier otro formato raro se sigue marcando como error
+        return None
 
+    if m.group("qty") is not None:
+        name_raw, set_code, lang, cond_part, qty_str = m.group("name", "set", "lang", "cond", "qty")
     else:
-        # Caso especial detectado en inventario_cartas_errores:
-        #   "<Nombre> - - es - NM - 1"
-        # se estaba parseando como:
-        #   ['<Nombre>', '- es', 'NM', '1']
-        #
-        # Aquí lo interpretamos como:
-        #   set_code = ""  (vacío)
-        #   lang     = "es" / "en" / etc.
-        if len(parts) == 4 and parts[1].startswith("-"):
-            name_raw = parts[0]
-            set_code = ""  # set vacío
-            lang = parts[1].lstrip("-").strip()  # "- es" -> "es"
-            cond_part = parts[2]
-            qty_str = parts[3]
-        else:
-            # Cualquier otro formato raro se sigue marcando como error
-            return None
+        # Caso especial "<Nombre> - - es - NM - 1": set vacío, "- es" -> "es"
+        name_raw, lang, cond_part, qty_str = m.group("name", "lang2", "cond2", "qty2")
+        set_code = ""
+        lang = lang.lstrip("-")
 
-    is_foil = False
-    cond_upper = cond_part.upper()
-    if cond_upper.endswith("_FOIL"):
-        is_foil = True
+    cond_upper = cond_part.strip().upper()
+    is_foil = cond_upper.endswith("_FOIL")
+    if is_foil:
         cond_upper = cond_upper.replace("_FOIL", "")
 
-    # Extraer SOLO el primer número de qty_str
-    # Ej: "1" -> 1, "1 (2)" -> 1, "4 copia" -> 4
-    m = re.match(r"(\d+)", qty_str)
-    if not m:
-        return None
-
-    try:
-        quantity = int(m.group(1))
-    except ValueError:
-        return None
+    # Solo el primer número de qty: "1" -> 1, "1 (2)" -> 1, "4 copia" -> 4
+    quantity = int(qty_str)
 
     return {
-        "name_raw": name_raw,
-        "set_code": (set_code or "").lower(),
-        "lang": (lang or "").lower(),
+        "name_raw": name_raw.strip(),
+        "set_code": set_code.strip().lower(),
+        "lang": lang.strip().lower(),
         "condition": cond_upper,
+        "condition_factor": CONDITION_MULTIPLIERS.get(cond_upper, 1.0),
         "is_foil": is_foil,
         "quantity": quantity,
     }
@@ -217,6 +273,69 @@ def parse_filename(filename: str) -> Optional[Dict[str, Any]]:
 
 # ========== SCRYFALL ==========
 
+def scryfall_throttle() -> None:
+    """
+    Espera lo necesario para respetar SCRYFALL_MIN_INTERVAL entre peticiones,
+    aunque se llame desde varios hilos a la vez.
+    """
+    global _scryfall_next_slot
+    with _scryfall_lock:
+        now = time.monotonic()
+        wait = _scryfall_next_slot - now
+        _scryfall_next_slot = max(now, _scryfall_next_slot) + SCRYFALL_MIN_INTERVAL
+    if wait > 0:
+        time.sleep(wait)
+
+
+def scryfall_backoff(seconds: float) -> None:
+    """
+    Pospone el próximo turno de TODOS los hilos `seconds` segundos desde ahora.
+    """
+    global _scryfall_next_slot
+    with _scryfall_lock:
+        _scryfall_next_slot = max(_scryfall_next_slot, time.monotonic() + seconds)
+
+
+def retry_after_seconds(resp: requests.Response) -> float:
+    """
+    Segundos indicados por Retry-After (1 s si no viene o no es un número).
+    """
+    try:
+        return max(float(resp.headers.get("Retry-After", "")), 0.0)
+    except ValueError:
+        return 1.0
+
+
+def scryfall_request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """
+    Petición a Scryfall respetando el límite de ritmo. Ante un 429 se frena a
+    todos los hilos lo que pida Retry-After y se reintenta (hasta
+    SCRYFALL_429_RETRIES veces); si sigue en 429 se devuelve esa respuesta.
+    """
+    for _ in range(SCRYFALL_429_RETRIES):
+        scryfall_throttle()
+        resp = SESSION.request(method, url, **kwargs)
+        if resp.status_code != 429:
+            return resp
+        scryfall_backoff(retry_after_seconds(resp))
+    scryfall_throttle()
+    return SESSION.request(method, url, **kwargs)
+
+
+def scryfall_get(url: str, params: Dict[str, Any], timeout: float = 10) -> requests.Response:
+    """
+    GET a Scryfall respetando el límite de peticiones (ver scryfall_request).
+    """
+    return scryfall_request("GET", url, params=params, timeout=timeout)
+
+
+def scryfall_post(url: str, payload: Dict[str, Any], timeout: float = 30) -> requests.Response:
+    """
+    POST (JSON) a Scryfall respetando el límite de peticiones.
+    """
+    return scryfall_request("POST", url, json=payload, timeout=timeout)
+
+
 def choose_best_scryfall_card(
     candidates: List[Dict[str, Any]],
     set_code: str,
@@ -268,6 +387,88 @@ def choose_best_scryfall_card(
     return best
 
 
+def card_has_price(card: Dict[str, Any]) -> bool:
+    prices = card.get("prices") or {}
+    return any(
+        prices.get(k) not in (None, "", "0", "0.0")
+        for k in ("usd", "usd_foil", "usd_etched", "eur")
+    )
+
+
+def choose_best_printing(cards: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    De una lista de cartas de Scryfall:
+    - Filtra cartas de juego físico (game:paper) y no digitales.
+    - Prioriza:
+        1) idioma inglés con precio
+        2) idioma inglés sin precio
+        3) cualquier otro idioma con precio
+        4) cualquier otra carta
+    """
+    physical = [
+        c for c in cards
+        if not c.get("digital") and "paper" in (c.get("games") or [])
+    ]
+    if not physical:
+        physical = cards
+
+    # Una sola pasada: idioma y precio se miran una vez por carta, y la
+    # primera en inglés con precio corta la búsqueda.
+    en_any = None
+    other_priced = None
+    for c in physical:
+        if c.get("lang") == "en":
+            if card_has_price(c):
+                return c
+            if en_any is None:
+                en_any = c
+        elif other_priced is None and card_has_price(c):
+            other_priced = c
+
+    if en_any is not None:
+        return en_any
+    if other_priced is not None:
+        return other_priced
+    return physical[0] if physical else None
+
+
+def scryfall_status_is_transient(status_code: int) -> bool:
+    """
+    True si el código HTTP es un fallo pasajero (429 o 5xx) que vale la pena
+    reintentar en otra corrida. Los demás 4xx (404, 400 por consulta mal
+    formada, etc.) son respuestas definitivas: se tratan como "sin resultado".
+    """
+    return status_code == 429 or status_code >= 500
+
+
+@lru_cache(maxsize=4096)
+def run_search_query(q: str) -> Optional[Dict[str, Any]]:
+    """
+    Ejecuta una búsqueda en /cards/search y devuelve la mejor impresión
+    (choose_best_printing), o None si no hubo resultados.
+
+    Se memoiza por texto de consulta: cartas con el mismo nombre en otro
+    idioma o set terminan en las mismas búsquedas por set o globales. Solo
+    quedan en memoria los resultados (incluido "sin resultados": 404 u otro
+    4xx, p. ej. 400 por una consulta mal formada); los errores de red, 429 y
+    5xx se propagan y no se memoizan.
+    """
+    resp = scryfall_get(
+        f"{SCRYFALL_API}/cards/search",
+        params={"q": q},
+        timeout=10,
+    )
+    if scryfall_status_is_transient(resp.status_code):
+        resp.raise_for_status()
+    if resp.status_code != 200:
+        return None
+    data = json_loads_response(resp)
+    cards = data.get("data") or []
+    if not cards:
+        return None
+    return choose_best_printing(cards)
+
+
 def scryfall_search(name: str, set_code: str, lang: str) -> Optional[Dict[str, Any]]:
     """
     Busca la carta en Scryfall con la siguiente estrategia:
@@ -281,6 +482,10 @@ def scryfall_search(name: str, set_code: str, lang: str) -> Optional[Dict[str, A
 
     En resumen: siempre que sea posible, hace fallback a la impresión en inglés
     (especialmente del mismo set) para asegurar que haya precio.
+
+    Devuelve None si Scryfall respondió que no hay resultados (404 u otro
+    4xx). Si no se encontró nada y además algún paso falló por red, 429 o
+    5xx (scryfall_status_is_transient), devuelve SCRYFALL_LOOKUP_FAILED.
     """
     import requests
 
@@ -291,102 +496,21 @@ def scryfall_search(name: str, set_code: str, lang: str) -> Optional[Dict[str, A
     if not name:
         return None
 
-    def has_price(card: Dict[str, Any]) -> bool:
-        prices = card.get("prices") or {}
-        return any(
-            prices.get(k) not in (None, "", "0", "0.0")
-            for k in ("usd", "usd_foil", "usd_etched", "eur")
-        )
-
-    def choose_best_printing(cards: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """
-        De una lista de cartas de Scryfall:
-        - Filtra cartas de juego físico (game:paper) y no digitales.
-        - Prioriza:
-            1) idioma inglés con precio
-            2) idioma inglés sin precio
-            3) cualquier otro idioma con precio
-            4) cualquier otra carta
-        """
-        physical = [
-            c for c in cards
-            if not c.get("digital") and "paper" in (c.get("games") or [])
-        ]
-        if not physical:
-            physical = cards
-
-        en_priced = [c for c in physical if c.get("lang") == "en" and has_price(c)]
-        if en_priced:
-            return en_priced[0]
-
-        en_any = [c for c in physical if c.get("lang") == "en"]
-        if en_any:
-            return en_any[0]
-
-        other_priced = [c for c in physical if has_price(c)]
-        if other_priced:
-            return other_priced[0]
-
-        return physical[0] if physical else None
-
-    def run_search_query(q: str) -> Optional[Dict[str, Any]]:
+    # 1) idioma + set, 2) mismo set sin idioma (preferirá inglés en
+    # choose_best_printing), 3) búsqueda global. Ver _SEARCH_QUERY_TEMPLATES.
+    fields = {"name": name, "set": set_code, "lang": lang}
+    failed = False
+    for template, needs_set, needs_lang in _SEARCH_QUERY_TEMPLATES:
+        if (needs_set and not set_code) or (needs_lang and not lang):
+            continue
         try:
-            resp = requests.get(
-                f"{SCRYFALL_API}/cards/search",
-                params={"q": q},
-                timeout=10,
-            )
-            if resp.status_code != 200:
-                return None
-            data = resp.json()
-            cards = data.get("data") or []
-            if not cards:
-                return None
-            return choose_best_printing(cards)
+            best = run_search_query(template.format_map(fields))
         except Exception:
-            return None
-
-    # 1) Intentar con idioma original + set (si tengo ambos)
-    if set_code and lang:
-        # nombre exacto
-        q = f'!"{name}" set:{set_code} lang:{lang} game:paper -is:token'
-        best = run_search_query(q)
-        if best:
-            return best
-
-        # nombre normal
-        q = f'{name} set:{set_code} lang:{lang} game:paper -is:token'
-        best = run_search_query(q)
-        if best:
-            return best
-
-    # 2) Fallback: MISMO set, sin idioma (preferirá inglés en choose_best_printing)
-    if set_code:
-        # nombre exacto
-        q = f'!"{name}" set:{set_code} game:paper -is:token'
-        best = run_search_query(q)
-        if best:
-            return best
-
-        # nombre normal
-        q = f'{name} set:{set_code} game:paper -is:token'
-        best = run_search_query(q)
+            failed = True
+            continue
         if best:
             return best
 
-    # 3) Búsqueda global HINT: aún puede encontrar impresiones en inglés de otros sets
-    # 3.a) nombre exacto global
-    q = f'!"{name}" game:paper -is:token'
-    best = run_search_query(q)
-    if best:
-        return best
-
-    # 3.b) nombre normal global
-    q = f'{name} game:paper -is:token'
-    best = run_search_query(q)
-    if best:
-        return best
-
     # 4) Último recurso: /cards/named (exact y fuzzy), que también suele devolver inglés
     named_endpoint = f"{SCRYFALL_API}/cards/named"
     attempts = []
@@ -400,20 +524,252 @@ def scryfall_search(name: str, set_code: str, lang: str) -> Optional[Dict[str, A
 
     for params in attempts:
         try:
-            resp = requests.get(named_endpoint, params=params, timeout=10)
+            resp = scryfall_get(named_endpoint, params=params, timeout=10)
+            if scryfall_status_is_transient(resp.status_code):
+                failed = True
+                continue
             if resp.status_code != 200:
                 continue
-            data = resp.json()
+            data = json_loads_response(resp)
             if data:
                 # /cards/named devuelve una sola carta
                 return data
         except Exception:
+            failed = True
             continue
 
-    return None
+    return SCRYFALL_LOOKUP_FAILED if failed else None
+
 
 
 
+def fetch_collection(
+    keys: List[Tuple[str, str, str]],
+) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    """
+    Resuelve claves (name_raw, set_code, "en") con /cards/collection, hasta
+    SCRYFALL_COLLECTION_BATCH identificadores {name, set} por POST.
+
+    Solo se aceptan impresiones físicas en inglés y CON precio: el lote
+    devuelve una sola impresión por {name, set} y, si no tiene precio, puede
+    haber otra del mismo set que sí tenga (la que preferiría
+    choose_best_printing). Lo que no se encuentre o no cumpla queda fuera del
+    resultado y se resuelve después con scryfall_search.
+    """
+    found: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    by_name_set = {(name.lower(), set_code): (name, set_code, lang) for name, set_code, lang in keys}
+
+    for start in range(0, len(keys), SCRYFALL_COLLECTION_BATCH):
+        chunk = keys[start:start + SCRYFALL_COLLECTION_BATCH]
+        identifiers = [{"name": name, "set": set_code} for name, set_code, _ in chunk]
+        try:
+            resp = scryfall_post(
+                f"{SCRYFALL_API}/cards/collection", {"identifiers": identifiers}
+            )
+            if resp.status_code != 200:
+                continue
+            data = json_loads_response(resp)
+        except Exception:
+            continue
+
+        for card in data.get("data") or []:
+            if card.get("digital") or "paper" not in (card.get("games") or []):
+                continue
+            if card.get("lang") != "en" or not card_has_price(card):
+                continue
+            set_code = (card.get("set") or "").lower()
+            full_name = (card.get("name") or "").lower()
+            # Cartas de dos caras: el identificador suele ser solo la cara frontal
+            for name in (full_name, full_name.split(" // ")[0]):
+                key = by_name_set.get((name, set_code))
+                if key is not None and key not in found:
+                    found[key] = card
+                    break
+
+    return found
+
+
+def download_scryfall_bulk(path: Path) -> bool:
+    """
+    Baja el archivo bulk "default_cards" de Scryfall a `path` si no existe o
+    tiene más de SCRYFALL_BULK_MAX_AGE. Se descarga por partes a un .tmp y
+    luego se reemplaza (si falla, el .tmp se borra). Devuelve True si hay un archivo utilizable (aunque
+    sea el anterior, si la descarga falla).
+    """
+    if path.exists() and time.time() - path.stat().st_mtime <= SCRYFALL_BULK_MAX_AGE:
+        return True
+
+    print("[INFO] Descargando bulk default_cards de Scryfall...")
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        resp = scryfall_get(f"{SCRYFALL_API}/bulk-data/default-cards", params={}, timeout=10)
+        resp.raise_for_status()
+        download_uri = json_loads_response(resp)["download_uri"]
+        with SESSION.get(download_uri, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            with tmp_path.open("wb") as f:
+                for block in resp.iter_content(chunk_size=1 << 20):
+                    f.write(block)
+        tmp_path.replace(path)
+    except (requests.RequestException, OSError, ValueError, KeyError) as e:
+        print(f"[WARN] No se pudo descargar el bulk de Scryfall ({e}).")
+        return path.exists()
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return True
+
+
+def load_scryfall_bulk_index(path: Path) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Indexa el bulk por (nombre en minúsculas, set), solo con impresiones
+    físicas en inglés (mismo criterio que fetch_collection). Las cartas de
+    dos caras se indexan también por la cara frontal. Si un nombre tiene
+    varias impresiones en el set, se prefiere una con precio.
+
+    Se guardan solo los campos de SCRYFALL_CACHE_FIELDS para no retener en
+    memoria el JSON completo. Con ijson el archivo se recorre en streaming
+    (memoria acotada al índice); sin ijson se decodifica entero.
+    """
+    index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    with path.open("rb") as f:
+        if ijson is not None:
+            _index_bulk_cards(ijson.items(f, "item", use_float=True), index)
+        else:
+            _index_bulk_cards(json_loads_bytes(f.read()), index)
+    return index
+
+
+def _index_bulk_cards(cards: Iterable[Dict[str, Any]], index: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+    """
+    Agrega a `index` las cartas de `cards` (lista o iterador de ijson).
+    """
+    for card in cards:
+        if card.get("digital") or "paper" not in (card.get("games") or []):
+            continue
+        if card.get("lang") != "en":
+            continue
+        set_code = (card.get("set") or "").lower()
+        full_name = (card.get("name") or "").lower()
+        slim = slim_scryfall_card(card)
+        for name in {full_name, full_name.split(" // ")[0]}:
+            prev = index.get((name, set_code))
+            if prev is None or (not card_has_price(prev) and card_has_price(slim)):
+                index[(name, set_code)] = slim
+
+
+def fetch_from_bulk(
+    keys: List[Tuple[str, str, str]],
+    bulk_index: Dict[Tuple[str, str], Dict[str, Any]],
+) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    """
+    Resuelve claves (name_raw, set_code, "en") contra el índice del bulk,
+    sin red. Lo que no esté queda fuera del resultado.
+    """
+    found: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for key in keys:
+        card = bulk_index.get((key[0].lower(), key[1]))
+        if card is not None:
+            found[key] = card
+    return found
+
+
+def fetch_all_cards(
+    keys: List[Tuple[str, str, str]],
+    bulk_index: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+    results: Optional[Dict[Tuple[str, str, str], Optional[Dict[str, Any]]]] = None,
+) -> Dict[Tuple[str, str, str], Optional[Dict[str, Any]]]:
+    """
+    Resuelve una lista de claves (name_raw, set_code, lang):
+
+    1) Las que traen set y son en inglés: primero en el índice del bulk (si
+       se entrega) y lo que falte en lote con /cards/collection.
+    2) El resto (y lo que no apareció en el lote) en paralelo con
+       scryfall_search. La red es el cuello de botella, así que se usan
+       hilos; el ritmo total hacia la API lo controla scryfall_throttle.
+
+    Si se entrega `results`, se va llenando a medida que llegan las cartas,
+    así el llamador conserva lo ya consultado aunque la corrida se corte.
+    Las claves que no se pudieron consultar quedan con SCRYFALL_LOOKUP_FAILED
+    (ver scryfall_search).
+    """
+    if results is None:
+        results = {}
+    if not keys:
+        return results
+
+    en_with_set = [k for k in keys if k[1] and k[2] == "en"]
+    if bulk_index:
+        results.update(fetch_from_bulk(en_with_set, bulk_index))
+        en_with_set = [k for k in en_with_set if k not in results]
+    results.update(fetch_collection(en_with_set))
+    pending = [k for k in keys if k not in results]
+    if not pending:
+        return results
+
+    with ThreadPoolExecutor(max_workers=SCRYFALL_WORKERS) as executor:
+        for key, card in zip(pending, executor.map(lambda k: scryfall_search(*k), pending)):
+            results[key] = card
+    return results
+
+
+# ========== CACHE EN DISCO DE SCRYFALL ==========
+
+def scryfall_cache_key(key: Tuple[str, str, str]) -> str:
+    """
+    Clave de texto (JSON) para (name_raw, set_code, lang).
+    """
+    return "|".join(part.lower() for part in key)
+
+
+def load_scryfall_cache(path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Carga la cache en disco. Si no existe o está corrupta, parte vacía.
+    Cada entrada: {"t": timestamp, "card": dict o None (no encontrada)}.
+    """
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] No se pudo leer la cache de Scryfall ({e}); se ignora.")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def scryfall_cache_entry_is_fresh(entry: Dict[str, Any], now: float) -> bool:
+    ttl = SCRYFALL_CACHE_TTL_HIT if entry.get("card") else SCRYFALL_CACHE_TTL_MISS
+    return now - entry.get("t", 0) <= ttl
+
+
+def save_scryfall_cache(path: Path, cache: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Guarda la cache descartando entradas vencidas. Se escribe a un .tmp y
+    luego se reemplaza, para no dejar el archivo a medias (si falla, el .tmp
+    se borra).
+    """
+    now = time.time()
+    fresh = {k: v for k, v in cache.items() if scryfall_cache_entry_is_fresh(v, now)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(fresh, f, ensure_ascii=False, separators=(",", ":"))
+        tmp_path.replace(path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def slim_scryfall_card(card: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Deja solo los campos de SCRYFALL_CACHE_FIELDS (None se mantiene None).
+    """
+    if not card:
+        return None
+    return {k: card[k] for k in SCRYFALL_CACHE_FIELDS if k in card}
+
 
 def compute_foil_flags(card_data: Dict[str, Any]) -> Tuple[bool, bool]:
     """
@@ -445,7 +801,7 @@ def adjust_is_foil_with_scryfall(is_foil: bool, card_data: Dict[str, Any]) -> bo
 
 def compute_price_for_card(
     card_data: Dict[str, Any],
-    condition: str,
+    condition_factor: float,
     is_foil: bool,
 ) -> Tuple[float, float]:
     """
@@ -456,6 +812,10 @@ def compute_price_for_card(
       marcamos el precio como "no confiable" → se devuelve price_clp = 0
       para que en la web aparezca "Consultar", pero dejamos price_usd_ref
       como referencia interna.
+    - Sin ningún precio USD -> ("", "") y el front mostrará "Consultar".
+
+    `is_foil` debe venir ya corregido con adjust_is_foil_with_scryfall y
+    `condition_factor` es el multiplicador ya resuelto para la condición.
     """
     prices = card_data.get("prices") or {}
     usd_normal = safe_float(prices.get("usd"))
@@ -488,16 +848,11 @@ def compute_price_for_card(
             usd_base = usd_foil
             price_reliable = False
 
-    prices = card_data.get("prices", {})
-    usd_normal = prices.get("usd") or ""
-    usd_foil = prices.get("usd_foil") or ""
-
-    # (Opcional) ajustar is_foil con la info de Scryfall
-    is_foil = adjust_is_foil_with_scryfall(is_foil, card_data)
+    if usd_base is None:
+        return "", ""   # no hay ningún precio USD disponible
 
-    price_usd_ref, price_clp = estimate_price_with_condition(
-        usd_normal, usd_foil, condition, is_foil
-    )
+    adjusted_usd, adjusted_clp = adjust_price(usd_base, condition_factor)
+    price_usd_ref = format(adjusted_usd, ".2f")
 
     # Si el precio no es confiable (ej. foil con versión nonfoil),
     # seteamos price_clp = 0 para que la web muestre "Consultar",
@@ -505,49 +860,146 @@ def compute_price_for_card(
     if not price_reliable:
         return 0.0, price_usd_ref
 
-    return price_clp, price_usd_ref
+    return str(adjusted_clp), price_usd_ref
 
 
 # ========== INVENTARIO EXISTENTE ==========
 
-def load_existing_inventory(path: Path) -> Tuple[Dict[str, Dict[str, Any]], int]:
+def existing_row_is_fresh(entry: Optional[Dict[str, Any]], now: float) -> bool:
+    """
+    Indica si una fila del CSV anterior se puede reutilizar: su carta tiene
+    que estar en la cache en disco de Scryfall (`entry`, encontrada) y haberse
+    resuelto hace menos de REUSE_EXISTING_TTL_HOURS.
+
+    Al reutilizar una fila su carta no se vuelve a consultar y la fecha de la
+    entrada no cambia, así que pasado el plazo la fila se recalcula (desde la
+    cache o Scryfall) aunque el CSV se haya reescrito entremedio.
+    """
+    if REUSE_EXISTING_TTL_HOURS <= 0 or not entry or not entry.get("card"):
+        return False
+    return now - entry.get("t", 0) <= REUSE_EXISTING_TTL_HOURS * 3600
+
+
+def existing_cell(row: List[str], cols: Dict[str, int], key: str) -> str:
+    """
+    Devuelve el valor de la columna `key` de una fila del CSV anterior
+    ("" si la columna no existe en el encabezado).
+    """
+    i = cols.get(key)
+    return row[i] if i is not None else ""
+
+
+def reuse_existing_row(
+    prev: Optional[List[str]], cols: Dict[str, int], info: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Si la fila previa corresponde a la misma carta del nombre de archivo
+    (set/lang) y ya tiene nombre resuelto, devuelve una fila nueva con sus datos calculados
+    (nombre, formato, foil, precios) sin consultar Scryfall.
+    La cantidad y el vendedor se toman siempre de la corrida actual.
+    """
+    if not prev:
+        return None
+    name = existing_cell(prev, cols, "name")
+    if not name:
+        return None
+    prev_set = existing_cell(prev, cols, "set")
+    prev_lang = existing_cell(prev, cols, "lang")
+    # Si el archivo no trae set/idioma, vale lo que resolvió Scryfall antes.
+    set_code = (info["set_code"] or "").lower()
+    if set_code and prev_set.lower() != set_code:
+        return None
+    lang = (info["lang"] or "").lower()
+    if lang and prev_lang.lower() != lang:
+        return None
+
+    return {
+        "id": "",
+        "name": name,
+        "set": prev_set,
+        "lang": prev_lang,
+        "condition": info["condition"],
+        "is_foil": existing_cell(prev, cols, "is_foil") or "false",
+        "quantity": info["quantity"],
+        "format": existing_cell(prev, cols, "format"),
+        "price_clp": existing_cell(prev, cols, "price_clp"),
+        "image_url": existing_cell(prev, cols, "image_url"),
+        "status": "available",
+        "price_usd_ref": existing_cell(prev, cols, "price_usd_ref"),
+        "seller_name": info.get("seller_name", ""),
+        "seller_phone": info.get("seller_phone", ""),
+    }
+
+
+def load_existing_inventory(
+    path: Path,
+) -> Tuple[Dict[str, List[str]], int, List[str]]:
     """
     Carga el inventario actual en un dict indexado por image_url.
-    También devuelve el max_id encontrado para seguir incrementando.
+    También devuelve el max_id encontrado para seguir incrementando
+    y el encabezado del CSV.
+
+    Se usa csv.reader (sin un dict por fila): cada fila queda como lista,
+    rellenada hasta el largo del encabezado, y se accede por índice de
+    columna (ver existing_cell).
     """
-    existing: Dict[str, Dict[str, Any]] = {}
+    existing: Dict[str, List[str]] = {}
     max_id = 0
     if not path.exists():
-        return existing, 0
+        return existing, 0, []
 
     with path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, [])
+        cols = {name: i for i, name in enumerate(header)}
+        img_i = cols.get("image_url")
+        id_i = cols.get("id")
+        if img_i is None:
+            return existing, 0, header
+
+        n_cols = len(header)
+        # Un id con menos caracteres que los dígitos de max_id no puede
+        # superarlo, así que se evita el int() en la mayoría de las filas.
+        max_id_len = 1
         for row in reader:
-            image_url = row.get("image_url", "").strip()
+            if not row:
+                continue
+            if len(row) < n_cols:
+                row += [""] * (n_cols - len(row))
+            image_url = row[img_i].strip()
             if not image_url:
                 continue
             existing[image_url] = row
+            if id_i is None or len(row[id_i]) < max_id_len:
+                continue
             try:
-                _id = int(row.get("id", "0") or "0")
+                _id = int(row[id_i] or "0")
                 if _id > max_id:
                     max_id = _id
+                    max_id_len = len(str(max_id))
             except ValueError:
                 continue
 
-    return existing, max_id
+    return existing, max_id, header
 
 
 def write_inventory(path: Path, rows: List[Dict[str, Any]]) -> None:
     """
     Escribe el CSV de inventario con las filas entregadas.
+    Se escribe primero a un .tmp y luego se reemplaza el archivo, para no
+    dejar un CSV a medias si el proceso se corta (si falla, el .tmp se borra).
     """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=HEADERS)
-        writer.writeheader()
-        for r in rows:
-            out = {h: r.get(h, "") for h in HEADERS}
-            writer.writerow(out)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8", newline="", buffering=CSV_WRITE_BUFFER) as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADERS)
+            writer.writerows([r.get(h, "") for h in HEADERS] for r in rows)
+        tmp_path.replace(path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
 def write_seller_inventories(rows: List[Dict[str, Any]]) -> None:
     """
@@ -578,29 +1030,26 @@ def write_seller_inventories(rows: List[Dict[str, Any]]) -> None:
             filename = "inventario_sin_vendedor.csv"
         else:
             base = f"{seller_name or 'Vendedor'}-{seller_phone or 'sin_telefono'}"
-            # slug muy simple: letras, números, _ y -
-            slug = re.sub(r"[^0-9A-Za-z_-]+", "_", base)
+            slug = _SLUG_RE.sub("_", base)
             filename = f"inventario_{slug}.csv"
 
-        out_path = SELLER_INVENTORIES_DIR / filename
-        with out_path.open("w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=HEADERS)
-            writer.writeheader()
-            for r in v_rows:
-                writer.writerow({h: r.get(h, "") for h in HEADERS})
+        write_inventory(SELLER_INVENTORIES_DIR / filename, v_rows)
 
 
-def append_error(path: Path, row: Dict[str, Any]) -> None:
+def parse_seller_folder(seller_folder: str) -> Tuple[str, str]:
     """
-    Agrega una fila al CSV de errores.
+    Devuelve (seller_name, seller_phone) a partir de la carpeta del vendedor.
+
+    Tomamos el último tramo como teléfono y el resto como nombre.
+    Ej: "Franco-56990590045" -> name="Franco" phone="56990590045"
     """
-    new_file = not path.exists()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["image_url", "error", "extra"])
-        if new_file:
-            writer.writeheader()
-        writer.writerow(row)
+    segments = seller_folder.split("-") if seller_folder else []
+    if len(segments) < 2:
+        return "", ""
+    seller_phone = segments[-1].lstrip("+").strip()
+    seller_name = "-".join(segments[:-1]).strip()
+    return seller_name, seller_phone
+
 
 def to_float_or_zero(v):
     try:
@@ -616,161 +1065,256 @@ def to_int_or_zero(v):
 
 # ========== CONSTRUCCIÓN DE INVENTARIO ==========
 
-def build_inventory():
+def build_inventory(use_cache: bool = True, use_bulk: bool = False):
+    """
+    Construye el inventario desde PROCESADAS_DIR.
+    Con use_cache=False se ignoran las entradas de la cache en disco de
+    Scryfall (igual se guardan las respuestas nuevas) y no se reutilizan
+    filas del CSV anterior. Con use_bulk=True las
+    cartas en inglés con set se buscan primero en el bulk default_cards.
+    """
     base_path = PROCESADAS_DIR
     if not base_path.exists():
         print(f"[ERROR] PROCESADAS_DIR no existe: {base_path}")
         return
 
     print(f"[INFO] Construyendo inventario desde: {base_path}")
-    # Reiniciar archivo de errores en cada corrida
-    if INVENTORY_ERRORES_CSV.exists():
-        INVENTORY_ERRORES_CSV.unlink()
 
-    existing_by_image, max_id = load_existing_inventory(INVENTORY_CSV)
+    existing_by_image, max_id, existing_header = load_existing_inventory(INVENTORY_CSV)
+    existing_cols = {name: i for i, name in enumerate(existing_header)}
     next_id = max_id + 1
+    # Cache en disco de Scryfall: decide qué filas del CSV anterior siguen
+    # frescas (fase 1) y evita consultas repetidas (fase 2).
+    disk_cache = load_scryfall_cache(SCRYFALL_CACHE_JSON)
+    now = time.time()
+    reuse_existing = use_cache and REUSE_EXISTING_TTL_HOURS > 0
+    reused_count = 0
 
     new_rows: List[Dict[str, Any]] = []
     seen_images = set()
 
     # Cache en memoria para evitar llamadas repetidas a Scryfall por la misma carta
     scryfall_cache: Dict[Tuple[str, str, str], Optional[Dict[str, Any]]] = {}
-
-    # Ahora buscamos imágenes en TODAS las subcarpetas de PROCESADAS
-    image_files = sorted(
-        [
-            p
-            for p in base_path.rglob("*")
-            if p.is_file() and p.suffix.lower() in [".jpg", ".jpeg", ".png"]
-        ],
-        key=lambda p: p.name.lower(),
-    )
-
-    for img_path in image_files:
+    # Cartas cuya consulta falló por red/servidor (no se sabe si existen)
+    lookup_failed = set()
+
+    # Ahora buscamos imágenes en TODAS las subcarpetas de PROCESADAS.
+    # Se trabaja con nombres (str) y la carpeta del vendedor se resuelve una
+    # sola vez por directorio, sin crear un Path por cada archivo.
+    image_files: List[Tuple[str, str]] = []  # (nombre de archivo, carpeta del vendedor)
+    sellers: Dict[str, Tuple[str, str]] = {}
+    for root, _, files in os.walk(base_path):
+        rel_root = os.path.relpath(root, base_path)
+        seller_folder = "" if rel_root == os.curdir else rel_root.split(os.sep, 1)[0]
+        if seller_folder not in sellers:
+            sellers[seller_folder] = parse_seller_folder(seller_folder)
+        for fname in files:
+            if os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS:
+                image_files.append((fname, seller_folder))
+    image_files.sort(key=lambda f: f[0].lower())
+
+    # Fase 1 (solo CPU): parsear nombres de archivo y decidir qué filas se
+    # reutilizan del CSV anterior; el resto define las cartas a consultar.
+    parsed: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]] = []
+    for image_name, seller_folder in image_files:
         # Ejemplo de ruta:
         # PROCESADAS/Franco-56990590045/Mishra's Bauble - 2XM - en - NM - 1.jpg
-        rel_path = img_path.relative_to(base_path)
-        parts = rel_path.parts
-
-        seller_folder = parts[0] if len(parts) > 1 else None
-
-        seller_name = ""
-        seller_phone = ""
-
-        if seller_folder:
-            # Tomamos el último tramo como teléfono y el resto como nombre.
-            # Ej: "Franco-56990590045" -> name="Franco" phone="56990590045"
-            segments = seller_folder.split("-")
-            if len(segments) >= 2:
-                seller_phone = segments[-1].lstrip("+").strip()
-                seller_name = "-".join(segments[:-1]).strip()
-
-        image_name = img_path.name
-        seen_images.add(image_name)
-
         info = parse_filename(image_name)
-        if not info:
-            append_error(
-                INVENTORY_ERRORES_CSV,
-                {
-                    "image_url": image_name,
-                    "error": "Nombre de archivo no cumple el patrón esperado",
-                    "extra": "",
-                },
-            )
-            continue
-
-        # Guardamos también los datos del vendedor dentro de info,
-        # para usarlos más abajo al construir la fila del CSV.
-        info["seller_name"] = seller_name
-        info["seller_phone"] = seller_phone
-
-        # ---- NUEVO: cache de Scryfall por (name_raw, set_code, lang) ----
-        cache_key = (info["name_raw"], info["set_code"], info["lang"])
-        if cache_key in scryfall_cache:
-            card_data = scryfall_cache[cache_key]
-        else:
-            card_data = scryfall_search(info["name_raw"], info["set_code"], info["lang"])
-            scryfall_cache[cache_key] = card_data
-            # Pequeño delay por respeto a la API de Scryfall (solo cuando llamamos a la API)
-            time.sleep(0.05)
-
-        if not card_data:
-            append_error(
-                INVENTORY_ERRORES_CSV,
-                {
-                    "image_url": image_name,
-                    "error": "No se pudo mapear en Scryfall",
-                    "extra": info["name_raw"],
-                },
-            )
-            continue
-
-        name = card_data.get("printed_name") or card_data.get("name") or info["name_raw"]
-        set_code = card_data.get("set", info["set_code"]).upper()
-        lang = card_data.get("lang", info["lang"]).lower()
-        legalities = card_data.get("legalities") or {}
-        fmt = pick_format(legalities)
-
-        is_foil_adj = adjust_is_foil_with_scryfall(info["is_foil"], card_data)
-
-        price_clp, price_usd_ref = compute_price_for_card(
-            card_data,
-            condition=info["condition"],
-            is_foil=is_foil_adj,
+        reused_row = None
+        if info:
+            # Guardamos también los datos del vendedor dentro de info,
+            # para usarlos más abajo al construir la fila del CSV.
+            info["seller_name"], info["seller_phone"] = sellers[seller_folder]
+
+            # Si la carta se resolvió hace poco y la fila del CSV anterior
+            # coincide con lo que dice el nombre del archivo, se reutiliza sin
+            # llamar a Scryfall.
+            card_key = (info["name_raw"], info["set_code"], info["lang"])
+            if reuse_existing and existing_row_is_fresh(
+                disk_cache.get(scryfall_cache_key(card_key)), now
+            ):
+                reused_row = reuse_existing_row(
+                    existing_by_image.get(image_name), existing_cols, info
+                )
+            if reused_row is None:
+                # ---- cache de Scryfall por (name_raw, set_code, lang) ----
+                scryfall_cache.setdefault(card_key, None)
+        parsed.append((image_name, info, reused_row))
+
+    # Fase 2 (red): consultar Scryfall en paralelo, una vez por carta distinta
+    # y solo si no está vigente en la cache en disco.
+    if scryfall_cache:
+        to_fetch: List[Tuple[str, str, str]] = []
+        for key in scryfall_cache:
+            entry = disk_cache.get(scryfall_cache_key(key)) if use_cache else None
+            if entry is not None and scryfall_cache_entry_is_fresh(entry, now):
+                scryfall_cache[key] = entry.get("card")
+            else:
+                to_fetch.append(key)
+
+        print(
+            f"[INFO] Scryfall: {len(scryfall_cache)} cartas distintas, "
+            f"{len(scryfall_cache) - len(to_fetch)} desde cache, {len(to_fetch)} a consultar"
         )
+        if to_fetch:
+            bulk_index = None
+            if use_bulk and download_scryfall_bulk(SCRYFALL_BULK_JSON):
+                bulk_index = load_scryfall_bulk_index(SCRYFALL_BULK_JSON)
+            fetched: Dict[Tuple[str, str, str], Optional[Dict[str, Any]]] = {}
+            try:
+                fetch_all_cards(to_fetch, bulk_index, fetched)
+            finally:
+                # Se guarda aunque la consulta se interrumpa (Ctrl+C, error de
+                # red), para no repetir en la próxima corrida lo ya obtenido.
+                # Las consultas fallidas no se guardan: se reintentan la
+                # próxima vez en vez de quedar como "no encontrada".
+                for key, card in fetched.items():
+                    if card is SCRYFALL_LOOKUP_FAILED:
+                        lookup_failed.add(key)
+                        continue
+                    scryfall_cache[key] = card
+                    disk_cache[scryfall_cache_key(key)] = {"t": now, "card": slim_scryfall_card(card)}
+                save_scryfall_cache(SCRYFALL_CACHE_JSON, disk_cache)
+
+    # Fase 3: armar las filas en el orden original de las imágenes.
+    # El archivo de errores se reinicia en cada corrida y solo se crea si
+    # aparece algún error; se escribe a medida que aparecen y en memoria solo
+    # queda el contador.
+    if INVENTORY_ERRORES_CSV.exists():
+        INVENTORY_ERRORES_CSV.unlink()
+    with ExitStack() as err_stack:
+        err_f = None
+        err_writer = None
+        err_count = 0
+
+        def log_error(image_url: str, error: str, extra: str = "") -> None:
+            nonlocal err_f, err_writer, err_count
+            if err_writer is None:
+                INVENTORY_ERRORES_CSV.parent.mkdir(parents=True, exist_ok=True)
+                err_f = err_stack.enter_context(INVENTORY_ERRORES_CSV.open(
+                    "w", encoding="utf-8", newline="", buffering=CSV_WRITE_BUFFER
+                ))
+                err_writer = csv.writer(err_f)
+                err_writer.writerow(ERROR_HEADERS)
+            err_writer.writerow((image_url, error, extra))
+            err_count += 1
+            if err_count % ERROR_FLUSH_EVERY == 0:
+                err_f.flush()
+
+        # Campos derivados de Scryfall (nombre, set, idioma, formato, foil y
+        # precios) por (carta, condición, foil): las copias de una misma carta
+        # en varias fotos o vendedores se calculan una sola vez.
+        card_fields: Dict[Tuple[Any, ...], Tuple[str, str, str, str, str, str, str]] = {}
+
+        for image_name, info, base_row in parsed:
+            seen_images.add(image_name)
+
+            if not info:
+                log_error(image_name, "Nombre de archivo no cumple el patrón esperado")
+                continue
 
-        base_row = {
-            "id": "",
-            "name": name,
-            "set": set_code,
-            "lang": lang,
-            "condition": info["condition"],
-            "is_foil": "true" if is_foil_adj else "false",
-            # Stock SIEMPRE desde el NOMBRE DEL ARCHIVO
-            "quantity": info["quantity"],
-            "format": fmt,
-            "price_clp": (
-                str(to_int_or_zero(price_clp))
-                if to_int_or_zero(price_clp) > 0
-                else ""
-            ),
-            "image_url": image_name,
-            "status": "available",
-            "price_usd_ref": (
-                f"{to_float_or_zero(price_usd_ref):.2f}"
-                if to_float_or_zero(price_usd_ref) > 0
-                else ""
-            ),
-
-            # NUEVO: datos del vendedor
-            "seller_name": info.get("seller_name", ""),
-            "seller_phone": info.get("seller_phone", ""),
-        }
-
-        existing = existing_by_image.get(image_name)
-        if existing:
-            # Mantener ID y status desde el CSV
-            base_row["id"] = existing.get("id", "") or ""
-            base_row["status"] = existing.get("status", "") or "available"
-        else:
-            # Carta nueva: asignamos un nuevo ID
-            base_row["id"] = str(next_id)
-            next_id += 1
-
-        new_rows.append(base_row)
-
-    # Marcar como "removed" las imágenes que estaban en el CSV y ya no existen en Procesadas
-    for image_url, row in existing_by_image.items():
-        if image_url not in seen_images:
-            status = (row.get("status") or "").lower()
+            if base_row is not None:
+                reused_count += 1
+            else:
+                card_key = (info["name_raw"], info["set_code"], info["lang"])
+                card_data = scryfall_cache[card_key]
+
+                if not card_data:
+                    if card_key in lookup_failed:
+                        log_error(
+                            image_name,
+                            "Error consultando Scryfall (se reintenta en la próxima corrida)",
+                            info["name_raw"],
+                        )
+                    else:
+                        log_error(image_name, "No se pudo mapear en Scryfall", info["name_raw"])
+                    continue
+
+                fields_key = card_key + (info["condition_factor"], info["is_foil"])
+                fields = card_fields.get(fields_key)
+                if fields is None:
+                    name = card_data.get("printed_name") or card_data.get("name") or info["name_raw"]
+                    set_code = card_data.get("set", info["set_code"]).upper()
+                    lang = card_data.get("lang", info["lang"]).lower()
+                    legalities = card_data.get("legalities") or {}
+                    fmt = pick_format(legalities)
+
+                    is_foil_adj = adjust_is_foil_with_scryfall(info["is_foil"], card_data)
+
+                    price_clp, price_usd_ref = compute_price_for_card(
+                        card_data,
+                        condition_factor=info["condition_factor"],
+                        is_foil=is_foil_adj,
+                    )
+                    # Se convierten una sola vez (antes se llamaba dos veces a cada helper)
+                    price_clp_int = to_int_or_zero(price_clp)
+                    price_usd_float = to_float_or_zero(price_usd_ref)
+
+                    fields = card_fields[fields_key] = (
+                        name,
+                        set_code,
+                        lang,
+                        fmt,
+                        "true" if is_foil_adj else "false",
+                        str(price_clp_int) if price_clp_int > 0 else "",
+                        format(price_usd_float, ".2f") if price_usd_float > 0 else "",
+                    )
+                name, set_code, lang, fmt, is_foil_str, price_clp_str, price_usd_str = fields
+
+                base_row = {
+                    "id": "",
+                    "name": name,
+                    "set": set_code,
+                    "lang": lang,
+                    "condition": info["condition"],
+                    "is_foil": is_foil_str,
+                    # Stock SIEMPRE desde el NOMBRE DEL ARCHIVO
+                    "quantity": info["quantity"],
+                    "format": fmt,
+                    "price_clp": price_clp_str,
+                    "image_url": image_name,
+                    "status": "available",
+                    "price_usd_ref": price_usd_str,
+
+                    # NUEVO: datos del vendedor
+                    "seller_name": info.get("seller_name", ""),
+                    "seller_phone": info.get("seller_phone", ""),
+                }
+
+            existing = existing_by_image.get(image_name)
+            if existing:
+                # Mantener ID y status desde el CSV
+                base_row["id"] = existing_cell(existing, existing_cols, "id")
+                base_row["status"] = (
+                    existing_cell(existing, existing_cols, "status") or "available"
+                )
+            else:
+                # Carta nueva: asignamos un nuevo ID
+                base_row["id"] = str(next_id)
+                next_id += 1
+
+            new_rows.append(base_row)
+
+    # Marcar como "removed" las imágenes que estaban en el CSV y ya no existen en Procesadas.
+    # La diferencia de conjuntos se hace en C; solo si hay eliminadas se recorre
+    # el CSV previo (en su orden original) para agregarlas.
+    removed = existing_by_image.keys() - seen_images
+    if removed:
+        for image_url, row in existing_by_image.items():
+            if image_url not in removed:
+                continue
+            status = existing_cell(row, existing_cols, "status").lower()
             if status != "removed":
-                row_copy = dict(row)
+                row_copy = dict(zip(existing_header, row))
                 row_copy["status"] = "removed"
                 new_rows.append(row_copy)
 
     write_inventory(INVENTORY_CSV, new_rows)
     print(f"[OK] Inventario generado en: {INVENTORY_CSV}")
+    if reused_count:
+        print(f"[INFO] {reused_count} filas reutilizadas del CSV anterior (sin consultar Scryfall)")
+    if err_count:
+        print(f"[WARN] {err_count} imágenes con errores, ver: {INVENTORY_ERRORES_CSV}")
 
     # NUEVO: generar inventarios separados por vendedor
     write_seller_inventories(new_rows)
@@ -778,4 +1322,16 @@ def build_inventory():
 
 
 if __name__ == "__main__":
-    build_inventory()
+    parser = argparse.ArgumentParser(description="Construye el inventario desde las fotos de Procesadas.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignora la cache en disco de Scryfall y vuelve a consultar todas las cartas.",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Usa el archivo bulk default_cards de Scryfall para las cartas en inglés con set.",
+    )
+    args = parser.parse_args()
+    build_inventory(use_cache=not args.no_cache, use_bulk=args.bulk)
@@ -0,0 +1,69 @@
+"""
+Sesión HTTP y decodificación JSON compartidas para las consultas a Scryfall.
+
+La usan auto_etiquetar_renombrar.py y construir_inventario_desde_fotos.py,
+así la política de conexiones y reintentos es la misma en ambos scripts.
+"""
+
+import json
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SCRYFALL_USER_AGENT = "inventario_magic/1.0"
+
+# orjson es opcional: si está instalado, decodifica las respuestas de
+# Scryfall y el bulk default_cards bastante más rápido que el módulo json
+# estándar. json_loads_bytes recibe bytes UTF-8.
+try:
+    import orjson
+
+    json_loads_bytes = orjson.loads
+
+    def json_loads_response(resp: requests.Response) -> Any:
+        return orjson.loads(resp.content)
+except ImportError:
+    json_loads_bytes = json.loads
+
+    def json_loads_response(resp: requests.Response) -> Any:
+        return resp.json()
+
+
+def make_scryfall_session() -> requests.Session:
+    """
+    Sesión HTTP para Scryfall: reutiliza la conexión TLS (keep-alive) entre
+    consultas. No hace falta fijar Accept-Encoding a mano: requests ya pide
+    "br" cuando el paquete brotli (o brotlicffi) está instalado y si no
+    gzip/deflate; fijar "br" sin brotli dejaría respuestas sin poder
+    decodificar.
+
+    Pool de conexiones acorde a los hilos que consultan en paralelo y
+    reintentos con backoff ante 5xx. Los 429 no se reintentan aquí: el
+    script que consulta en paralelo los maneja aparte (ver scryfall_request
+    en construir_inventario_desde_fotos.py) para frenar a todos los hilos a
+    la vez. raise_on_status=False: si se agotan los reintentos se devuelve la
+    última respuesta y el código que llama decide qué hacer con ella.
+    """
+    session = requests.Session()
+    # Scryfall pide identificarse con User-Agent y Accept propios.
+    session.headers.update({
+        "User-Agent": SCRYFALL_USER_AGENT,
+        "Accept": "application/json;q=0.9,*/*;q=0.8",
+    })
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "POST"}),
+                raise_on_status=False,
+            ),
+        ),
+    )
+    return session